@@ -0,0 +1,114 @@
+"""
+Benchmarks `merge_additional_information` (raw dictionaries normalized in batches) against the
+previous implementation, which built a one-row DataFrame per account and concatenated them.
+
+Run from the repository root:
+
+    python benchmarks/bench_details_merge.py --accounts 20000 --batch-size 5000
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+import pandas as pd
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+os.chdir(
+    REPO_ROOT
+)  # extract_crm_to_csv loads its logging config from the working directory
+
+import extract_crm_to_csv  # noqa: E402
+from extract_crm_to_csv import merge_additional_information  # noqa: E402
+
+
+def merge_additional_information_legacy(
+    df: pd.DataFrame, results: list
+) -> pd.DataFrame:
+    """
+    The one-row DataFrame implementation that `merge_additional_information` replaced.
+    """
+    frames = [pd.json_normalize(result) for result in results]
+    all_information = pd.concat(frames, ignore_index=True)
+    return pd.merge(
+        df, all_information, on=["accountId"], how="outer", validate="one_to_one"
+    )
+
+
+def synthetic_details(accounts: int, seed: int = 0):
+    """
+    Returns an account DataFrame and the nested detail dictionaries of its accounts, shaped like
+    the "individualAccount" payloads of the API (optional fields are missing for some accounts).
+    """
+    rng = random.Random(seed)
+    account_ids = [str(account_id) for account_id in range(1, accounts + 1)]
+    df = pd.DataFrame({"accountId": account_ids})
+    results = []
+    for account_id in account_ids:
+        if rng.random() < 0.02:  # failed request or type mismatch
+            results.append({"accountId": account_id})
+            continue
+        details = {
+            "accountId": account_id,
+            "primaryContact": {
+                "firstName": f"First{account_id}",
+                "lastName": f"Last{account_id}",
+                "email1": f"user{account_id}@example.com",
+                "addresses": [{"city": "San Francisco", "isPrimaryAddress": True}],
+            },
+            "timestamps": {
+                "createdDateTime": f"20{rng.randint(10, 24)}-01-01T00:00:00Z",
+                "lastModifiedDateTime": "2024-06-01T00:00:00Z",
+                "createdBy": "import",
+            },
+            "origin": {"originDetail": rng.choice(["web", "import", "admin"])},
+        }
+        if rng.random() < 0.5:
+            details["company"] = {"id": str(rng.randint(1, 500)), "name": "Example"}
+        if rng.random() < 0.3:
+            details["accountCustomFields"] = [{"id": "12", "value": "yes"}]
+        results.append(details)
+    return df, results
+
+
+def measured(function, df, results):
+    tracemalloc.start()
+    t1 = time.perf_counter()
+    merged = function(df.copy(), results)
+    elapsed = time.perf_counter() - t1
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return merged, elapsed, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--accounts", type=int, default=20000)
+    parser.add_argument("--batch-size", type=int, default=5000)
+    args = parser.parse_args()
+
+    extract_crm_to_csv.NORMALIZE_BATCH_SIZE = args.batch_size
+    df, results = synthetic_details(args.accounts)
+
+    legacy, legacy_time, legacy_peak = measured(
+        merge_additional_information_legacy, df, results
+    )
+    batched, batched_time, batched_peak = measured(
+        merge_additional_information, df, results
+    )
+
+    pd.testing.assert_frame_equal(legacy, batched)
+    print(f"{args.accounts} accounts, batches of {args.batch_size}")
+    print(f"one-row frames: {legacy_time:8.3f} s  {legacy_peak / 2**20:8.1f} MiB peak")
+    print(
+        f"batched:        {batched_time:8.3f} s  {batched_peak / 2**20:8.1f} MiB peak"
+    )
+    print(f"speed-up:       {legacy_time / batched_time:8.1f} x")
+
+
+if __name__ == "__main__":
+    main()
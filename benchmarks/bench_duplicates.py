@@ -0,0 +1,213 @@
+"""
+Benchmarks the duplicate-account detection of `metrics.py` (`get_duplicate_accounts`)
+on synthetic accounts with injected duplicates.
+
+Run from the repository root:
+
+    python benchmarks/bench_duplicates.py --accounts 10000 100000 200000
+
+For every size it reports the number of candidate pairs of the blocking index, the run time
+and the share of the injected duplicates that were found. Up to --exhaustive accounts, all
+pairs are also scored (the O(n^2) comparison) to check that blocking does not miss
+duplicates the exhaustive comparison finds.
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+from metrics import (  # noqa: E402
+    DUPLICATE_MIN_SCORE,
+    get_duplicate_accounts,
+    get_duplicate_candidates,
+    score_duplicate_pairs,
+)
+
+FIRST_NAMES = [
+    "Anna",
+    "Andreas",
+    "Beat",
+    "Claudia",
+    "Daniel",
+    "Eva",
+    "Fabian",
+    "Franziska",
+    "Hans",
+    "Ines",
+    "Jonas",
+    "Julia",
+    "Karin",
+    "Lukas",
+    "Marco",
+    "Maria",
+    "Nicole",
+    "Patrick",
+    "Peter",
+    "Sandra",
+    "Simon",
+    "Thomas",
+    "Ursula",
+    "Yves",
+    "Laura",
+    "Michael",
+    "Sarah",
+    "David",
+    "Christine",
+    "Stefan",
+]
+CONSONANTS = list("bcdfghklmnprstvwz") + ["ch", "sch", "st", "br", "tr"]
+VOWELS = list("aeiou") + ["ei", "ue", "au"]
+LEGAL_FORMS = ["AG", "GmbH", "SA", "Sàrl", "Inc.", "Ltd"]
+
+
+def random_words(rng, count: int, syllables: int) -> np.ndarray:
+    consonants = rng.choice(CONSONANTS, (count, syllables))
+    vowels = rng.choice(VOWELS, (count, syllables))
+    words = [
+        "".join(c + v for c, v in zip(cs, vs)) for cs, vs in zip(consonants, vowels)
+    ]
+    return np.array([word.capitalize() for word in words], dtype=object)
+
+
+def typo(rng, text: str) -> str:
+    """Swaps two neighbouring letters or drops one."""
+    if len(text) < 4:
+        return text
+    i = int(rng.integers(1, len(text) - 2))
+    if rng.random() < 0.5:
+        return text[:i] + text[i + 1] + text[i] + text[i + 2 :]
+    return text[:i] + text[i + 1 :]
+
+
+def synthetic_accounts(
+    accounts: int, mode: str, duplicate_share: float = 0.03, seed: int = 0
+):
+    """
+    Returns accounts with the columns of get_quality_columns and the injected duplicate
+    pairs (account IDs).
+    """
+    rng = np.random.default_rng(seed)
+    originals = int(accounts / (1 + duplicate_share))
+    ids = np.arange(100000, 100000 + accounts).astype(str)
+    if mode == "individual":
+        first = rng.choice(FIRST_NAMES, originals)
+        last = random_words(rng, originals, 3)
+        df = pd.DataFrame(
+            {
+                "firstName": first,
+                "lastName": last,
+                "email": [
+                    f"{f}.{l}{i}@example.ch".lower()
+                    for i, (f, l) in enumerate(zip(first, last))
+                ],
+                "companyName": random_words(rng, originals, 2),
+            }
+        )
+    else:
+        names = random_words(rng, originals, 2) + " " + random_words(rng, originals, 3)
+        df = pd.DataFrame(
+            {
+                "companyName": names + " " + rng.choice(LEGAL_FORMS, originals),
+                "email": [
+                    f"info{i}@{n.split()[0].lower()}.ch" for i, n in enumerate(names)
+                ],
+                "primaryContactAccountId": rng.integers(1, 10**6, originals).astype(
+                    str
+                ),
+            }
+        )
+    # some fields are missing, like in the CRM
+    df["email"] = df["email"].where(rng.random(originals) > 0.2)
+
+    sources = rng.choice(originals, accounts - originals, replace=False)
+    copies = df.iloc[sources].reset_index(drop=True)
+    for i in range(len(copies)):
+        variant = rng.integers(3)
+        if mode == "individual":
+            if variant == 0:
+                copies.at[i, "lastName"] = typo(rng, copies.at[i, "lastName"])
+            elif variant == 1 and isinstance(copies.at[i, "email"], str):
+                copies.at[i, "email"] = copies.at[i, "email"].upper()
+                copies.at[i, "firstName"] = typo(rng, copies.at[i, "firstName"])
+            else:
+                copies.at[i, "firstName"] = copies.at[i, "firstName"].upper()
+        else:
+            name = copies.at[i, "companyName"].rsplit(" ", 1)[0]
+            if variant == 0:
+                copies.at[i, "companyName"] = f"{name} {rng.choice(LEGAL_FORMS)}"
+            elif variant == 1:
+                copies.at[i, "companyName"] = typo(rng, name)
+            else:
+                copies.at[i, "companyName"] = name.lower()
+                copies.at[i, "email"] = None
+    df = pd.concat([df, copies], ignore_index=True)
+    df.insert(0, "accountId", ids)
+    injected = set(zip(ids[sources], ids[originals:]))
+    return df, injected
+
+
+def found_pairs(duplicates: pd.DataFrame) -> set:
+    pairs = set()
+    for a, b in zip(duplicates["accountId"], duplicates["duplicateAccountId"]):
+        pairs.add((min(a, b), max(a, b)))
+    return pairs
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--accounts", type=int, nargs="+", default=[10000, 100000])
+    parser.add_argument(
+        "--mode",
+        choices=["individual", "company"],
+        nargs="+",
+        default=["individual", "company"],
+    )
+    parser.add_argument(
+        "--exhaustive",
+        type=int,
+        default=3000,
+        help="largest size that is also compared pairwise",
+    )
+    args = parser.parse_args()
+
+    print(
+        f"{'mode':<11} {'accounts':>9} {'candidates':>11} {'time':>8} "
+        f"{'reported':>9} {'recall':>7} {'vs all pairs':>13}"
+    )
+    for mode in args.mode:
+        for accounts in args.accounts:
+            df, injected = synthetic_accounts(accounts, mode)
+            t1 = time.perf_counter()
+            duplicates = get_duplicate_accounts(df, mode)
+            elapsed = time.perf_counter() - t1
+            candidates = len(get_duplicate_candidates(df, mode))
+            reported = found_pairs(duplicates)
+            recall = len(injected & reported) / len(injected)
+
+            exhaustive = "-"
+            if accounts <= args.exhaustive:
+                a, b = np.triu_indices(len(df), k=1)
+                pairs = pd.DataFrame({"row_a": a, "row_b": b})
+                scored = score_duplicate_pairs(df, mode, pairs, DUPLICATE_MIN_SCORE)
+                ids = df["accountId"].to_numpy()
+                expected = {
+                    tuple(sorted(p))
+                    for p in zip(ids[scored["row_a"]], ids[scored["row_b"]])
+                }
+                exhaustive = f"{len(reported & expected)}/{len(expected)}"
+            print(
+                f"{mode:<11} {accounts:>9} {candidates:>11} {elapsed:>6.2f} s {len(reported):>9} "
+                f"{recall:>7.1%} {exhaustive:>13}",
+                flush=True,
+            )
+
+
+if __name__ == "__main__":
+    main()
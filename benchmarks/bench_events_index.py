@@ -0,0 +1,95 @@
+"""
+Benchmarks the account -> events hash index (`build_account_events_index` and
+`map_events_to_accounts`) against the previous implementation, which scanned the whole
+"accountId" column twice per attendee.
+
+Run from the repository root:
+
+    python benchmarks/bench_events_index.py --accounts 5000 --events 200 --attendees 40
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+import pandas as pd
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+os.chdir(
+    REPO_ROOT
+)  # extract_crm_to_csv loads its logging config from the working directory
+
+from extract_crm_to_csv import (  # noqa: E402
+    build_account_events_index,
+    map_events_to_accounts,
+)
+
+
+def assign_events_to_accounts_legacy(
+    df: pd.DataFrame, event_attendees: dict
+) -> pd.DataFrame:
+    """
+    The column-scan implementation that the hash index replaced.
+    """
+    df.loc[:, "event_ids"] = [[] for _ in range(len(df))]
+
+    for event_id, attendees in event_attendees.items():
+        for attendee in attendees:
+            df.loc[df["accountId"] == attendee, "event_ids"] = df.loc[
+                df["accountId"] == attendee, "event_ids"
+            ].apply(lambda x: x + [event_id])
+
+    return df
+
+
+def synthetic_data(accounts: int, events: int, attendees: int, seed: int = 0):
+    """
+    Returns an account DataFrame and an event -> attendee IDs dictionary shaped like the API data.
+    """
+    rng = random.Random(seed)
+    account_ids = [str(account_id) for account_id in range(1, accounts + 1)]
+    df = pd.DataFrame({"accountId": account_ids})
+    event_attendees = {
+        event_id: rng.sample(account_ids, min(attendees, accounts))
+        for event_id in range(1, events + 1)
+    }
+    return df, event_attendees
+
+
+def assign_events_to_accounts(df: pd.DataFrame, event_attendees: dict) -> pd.DataFrame:
+    return map_events_to_accounts(df, build_account_events_index(event_attendees))
+
+
+def timed(function, df, event_attendees):
+    t1 = time.perf_counter()
+    result = function(df.copy(), event_attendees)
+    return result, time.perf_counter() - t1
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--accounts", type=int, default=5000)
+    parser.add_argument("--events", type=int, default=200)
+    parser.add_argument("--attendees", type=int, default=40)
+    args = parser.parse_args()
+
+    df, event_attendees = synthetic_data(args.accounts, args.events, args.attendees)
+
+    legacy, legacy_time = timed(assign_events_to_accounts_legacy, df, event_attendees)
+    indexed, indexed_time = timed(assign_events_to_accounts, df, event_attendees)
+
+    assert legacy["event_ids"].tolist() == indexed["event_ids"].tolist()
+    print(
+        f"{args.accounts} accounts, {args.events} events, "
+        f"{args.events * args.attendees} attendances"
+    )
+    print(f"column scan:  {legacy_time:8.3f} s")
+    print(f"hash index:   {indexed_time:8.3f} s")
+    print(f"speed-up:     {legacy_time / indexed_time:8.1f} x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,180 @@
+"""
+Runs the full extraction (`print_all_accounts_to_csv`) against the local NeonCRM stand-in
+(`mock_neoncrm.py`) and reports wall time, requests per second and peak memory per dataset size.
+
+Run from the repository root:
+
+    python benchmarks/bench_extraction.py --accounts 1000 10000 100000 --latency 0.02
+
+Every size is extracted in a fresh child process inside a temporary directory, with the
+response cache, attendee store and snapshot disabled, so the numbers are comparable between runs.
+"""
+
+import argparse
+import json
+import os
+import resource
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+BENCHMARKS = os.path.dirname(os.path.abspath(__file__))
+REPO_ROOT = os.path.dirname(BENCHMARKS)
+
+
+def wait_for_port(port: int, timeout: float = 60.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with socket.create_connection(("127.0.0.1", port), timeout=1):
+                return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError(f"The mock server did not start on port {port}")
+
+
+def run_extraction(args) -> None:
+    """
+    Child process: runs one extraction in the current directory and prints its measurements as JSON.
+    """
+    sys.path.insert(0, REPO_ROOT)
+    import extract_crm_to_csv as extraction
+
+    extraction.API_BASE_URL = f"http://127.0.0.1:{args.port}/v2"
+    extraction.MAX_CONCURRENCY = args.concurrency
+    extraction.ACCOUNT_SLOTS = args.concurrency // 2
+    extraction.rate_limiter = extraction.TokenBucket(
+        args.client_rate, int(args.client_rate)
+    )
+    extraction.USE_CACHE = False
+    extraction.USE_ATTENDEE_STORE = False
+    extraction.USE_SNAPSHOT = False
+    extraction.BULK_DETAILS = args.bulk_details
+
+    t1 = time.perf_counter()
+    extraction.print_all_accounts_to_csv()
+    wall_time = time.perf_counter() - t1
+
+    requests = extraction.connection_stats["requests"]
+    print(
+        json.dumps(
+            {
+                "wall_time": wall_time,
+                "requests": requests,
+                "requests_per_second": requests / wall_time,
+                # kilobytes on Linux, bytes on macOS
+                "peak_rss_mib": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+                / (1024 if sys.platform != "darwin" else 1024 * 1024),
+                "failed": len(extraction.dead_letters),
+            }
+        )
+    )
+
+
+def benchmark(accounts: int, args) -> dict:
+    """
+    Starts the mock server with `accounts` accounts and runs one extraction against it
+    in a child process.
+    """
+    server = subprocess.Popen(
+        [
+            sys.executable,
+            os.path.join(BENCHMARKS, "mock_neoncrm.py"),
+            "--accounts",
+            str(accounts),
+            "--events",
+            str(args.events),
+            "--latency",
+            str(args.latency),
+            "--error-rate",
+            str(args.error_rate),
+            "--port",
+            str(args.port),
+        ]
+        + (["--rate-limit", str(args.rate_limit)] if args.rate_limit else []),
+        stdout=subprocess.DEVNULL,
+    )
+    workdir = tempfile.mkdtemp(prefix="neoncrm-bench-")
+    try:
+        wait_for_port(args.port)
+        # extract_crm_to_csv loads its logging config from the working directory
+        shutil.copy(os.path.join(REPO_ROOT, "NeonCRMAnalytics.log"), workdir)
+        child = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), "--child"]
+            + [
+                "--port",
+                str(args.port),
+                "--concurrency",
+                str(args.concurrency),
+                "--client-rate",
+                str(args.client_rate),
+            ]
+            + (["--bulk-details"] if args.bulk_details else []),
+            cwd=workdir,
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        return json.loads(child.stdout.strip().splitlines()[-1])
+    finally:
+        server.terminate()
+        server.wait()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument(
+        "--accounts", type=int, nargs="+", default=[1000, 10000, 100000]
+    )
+    parser.add_argument("--events", type=int, default=200)
+    parser.add_argument(
+        "--latency",
+        type=float,
+        default=0.02,
+        help="mean server response delay in seconds",
+    )
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument(
+        "--rate-limit",
+        type=float,
+        default=None,
+        help="server-side requests per second before 429",
+    )
+    parser.add_argument(
+        "--client-rate",
+        type=float,
+        default=10000.0,
+        help="API_RATE_LIMIT of the extraction",
+    )
+    parser.add_argument(
+        "--concurrency", type=int, default=100, help="MAX_CONCURRENCY of the extraction"
+    )
+    parser.add_argument("--bulk-details", action="store_true")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_extraction(args)
+        return
+
+    print(
+        f"{'accounts':>9} {'wall time':>10} {'requests':>9} {'req/s':>8} "
+        f"{'peak RSS':>10} {'failed':>7}"
+    )
+    for accounts in args.accounts:
+        result = benchmark(accounts, args)
+        print(
+            f"{accounts:>9} {result['wall_time']:>8.1f} s {result['requests']:>9} "
+            f"{result['requests_per_second']:>8.0f} {result['peak_rss_mib']:>6.0f} MiB "
+            f"{result['failed']:>7}",
+            flush=True,
+        )
+
+
+if __name__ == "__main__":
+    main()
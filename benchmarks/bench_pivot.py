@@ -0,0 +1,157 @@
+"""
+Benchmarks the crosstab metrics of `metrics.py` (built on `pivot_counts`) against the previous
+implementations, which filled every cell with a full boolean pass over the columns.
+
+Run from the repository root:
+
+    python benchmarks/bench_pivot.py --rows 1000000
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+from metrics import (  # noqa: E402
+    fee_vs_member_type,
+    get_past_members,
+    membership_type_vs_events,
+    number_of_membership_vs_membership_type,
+)
+
+
+def fee_vs_member_type_legacy(df):
+    fee = df["Fee"]
+    member_type = df["Membership Type"]
+    fees = fee.unique()
+    types = member_type.unique()
+    values_df = pd.DataFrame(
+        np.zeros((len(types), len(fees))), index=types, columns=fees, dtype=int
+    )
+    for i, f in enumerate(fees):
+        for j, t in enumerate(types):
+            values_df.loc[t, f] = np.sum((fee == f) & (member_type == t))
+    values_df.columns = [f"{col}$" for col in values_df.columns]
+    return values_df
+
+
+def membership_type_vs_events_legacy(df):
+    num_events = df["event_ids"].apply(len)
+    member_type = df["Membership Type"].copy()
+    member_type[get_past_members(df).index] = "Past Member"
+    event = num_events.unique()
+    types = member_type.unique()
+    values_df = pd.DataFrame(
+        np.zeros((len(types), len(event))), index=types, columns=event, dtype=int
+    )
+    for i, e in enumerate(event):
+        for j, t in enumerate(types):
+            values_df.loc[t, e] = np.sum((num_events == e) & (member_type == t))
+    columns = list(values_df.columns[values_df.columns > 3])
+    values_df["4+"] = values_df[columns].sum(axis=1)
+    values_df.drop(columns=columns, inplace=True)
+    values_df = values_df[[0, 1, 2, 3, "4+"]]
+    values_df["Grand Total"] = values_df.sum(axis=1)
+    values_df.loc["Grand Total"] = values_df.sum(axis=0)
+    return values_df
+
+
+def number_of_membership_vs_membership_type_legacy(df):
+    membership_type = df["Membership Type"]
+    number_of_memberships = df["Number of Memberships"]
+    types = membership_type.unique()
+    memberships = number_of_memberships.unique()
+    values_df = pd.DataFrame(
+        np.zeros((len(types), len(memberships))),
+        index=types,
+        columns=memberships,
+        dtype=int,
+    )
+    for i, m in enumerate(memberships):
+        for j, t in enumerate(types):
+            values_df.loc[t, m] = np.sum(
+                (number_of_memberships == m) & (membership_type == t)
+            )
+    values_df = values_df[sorted(values_df.columns)].T
+    values_df["Grand Total"] = values_df.sum(axis=1)
+    return values_df
+
+
+def synthetic_accounts(rows: int, seed: int = 0) -> pd.DataFrame:
+    """
+    Returns an account DataFrame with the columns used by the crosstab metrics.
+    """
+    rng = np.random.default_rng(seed)
+    levels = np.array(
+        [
+            "No Membership active",
+            "Individual",
+            "Young Professional",
+            "Corporate",
+            "Patron",
+            "Student",
+        ],
+        dtype=object,
+    )
+    membership_type = levels[
+        rng.choice(len(levels), rows, p=[0.5, 0.2, 0.1, 0.1, 0.05, 0.05])
+    ]
+    active = membership_type != "No Membership active"
+    fee = np.where(active, rng.choice([75.0, 150.0, 300.0, 1200.0, 2500.0], rows), 0.0)
+    memberships = np.where(
+        active, rng.integers(1, 12, rows), rng.choice([0, 0, 1, 3], rows)
+    )
+    event_counts = rng.choice([0, 0, 0, 1, 1, 2, 3, 4, 6, 9], rows)
+    return pd.DataFrame(
+        {
+            "Membership Type": membership_type,
+            "Fee": fee,
+            "Number of Memberships": memberships,
+            "event_ids": [list(range(n)) for n in event_counts],
+        }
+    )
+
+
+def timed(function, df):
+    t1 = time.perf_counter()
+    result = function(df)
+    return result, time.perf_counter() - t1
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=1000000)
+    args = parser.parse_args()
+
+    df = synthetic_accounts(args.rows)
+    print(f"{args.rows} accounts")
+    for name, legacy, pivoted in [
+        ("fee vs member type", fee_vs_member_type_legacy, fee_vs_member_type),
+        (
+            "member type vs events",
+            membership_type_vs_events_legacy,
+            membership_type_vs_events,
+        ),
+        (
+            "memberships vs member type",
+            number_of_membership_vs_membership_type_legacy,
+            number_of_membership_vs_membership_type,
+        ),
+    ]:
+        expected, legacy_time = timed(legacy, df)
+        result, pivot_time = timed(pivoted, df)
+        pd.testing.assert_frame_equal(result, expected)
+        print(
+            f"{name:<28} cell scan: {legacy_time:7.3f} s   pivot: {pivot_time:7.3f} s   "
+            f"speed-up: {legacy_time / pivot_time:6.1f} x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,456 @@
+"""
+Local stand-in for the NeonCRM v2 API, serving a synthetic dataset so that the extraction
+can be tested and benchmarked without touching the production API.
+
+Run from the repository root:
+
+    python benchmarks/mock_neoncrm.py --accounts 10000 --latency 0.05 \
+        --error-rate 0.01 --rate-limit 50
+
+and point the extraction at it by setting `API_BASE_URL` to "http://127.0.0.1:8765/v2".
+
+Endpoints:
+    GET  /v2/accounts?userType=...&pageSize=...&currentPage=...
+    GET  /v2/accounts/{id}
+    GET  /v2/accounts/{id}/memberships
+    GET  /v2/accounts/search/outputFields
+    POST /v2/accounts/search
+    GET  /v2/events?pageSize=...
+    GET  /v2/events/{id}/attendees
+"""
+
+import argparse
+import asyncio
+import hashlib
+import random
+import time
+from datetime import date, timedelta
+
+from aiohttp import web
+
+FIRST_NAMES = [
+    "Anna",
+    "Ben",
+    "Chloé",
+    "David",
+    "Eva",
+    "Felix",
+    "Gina",
+    "Hans",
+    "Iris",
+    "Jon",
+]
+LAST_NAMES = [
+    "Müller",
+    "Meier",
+    "Smith",
+    "O'Neil",
+    "Keller",
+    "Brown",
+    "Weber",
+    "Garcia",
+]
+COMPANY_WORDS = [
+    "Alpine",
+    "Pacific",
+    "Helvetia",
+    "Bay",
+    "Summit",
+    "Lake",
+    "Golden",
+    "Swiss",
+]
+COMPANY_SUFFIXES = ["AG", "GmbH", "Inc.", "LLC", "SA"]
+MEMBERSHIP_LEVELS = [
+    ("Individual", 150.0),
+    ("Young Professional", 75.0),
+    ("Corporate", 1200.0),
+]
+ORIGINS = ["web", "import", "admin", None]
+SOURCES = ["Event", "Referral", "Website", None]
+SEARCH_OUTPUT_FIELDS = {
+    "Account ID": ("accountId",),
+    "Account Created Date/Time": ("timestamps", "createdDateTime"),
+    "Account Created By": ("timestamps", "createdBy"),
+    "Account Last Modified Date/Time": ("timestamps", "lastModifiedDateTime"),
+    "Account Last Modified By": ("timestamps", "lastModifiedBy"),
+    "Origin Detail": ("origin", "originDetail"),
+    "Source": ("source", "name"),
+    "Email 1": ("primaryContact", "email1"),
+}
+SEARCH_ACCOUNT_TYPES = {"Individual": "INDIVIDUAL", "Company": "COMPANY"}
+
+
+class SyntheticDataset:
+    """
+    Deterministic synthetic NeonCRM data. Every record is derived from the seed and its ID,
+    so nothing but the listings has to be kept in memory, even for 100k+ accounts.
+
+    Parameters:
+        accounts (int): The number of accounts; roughly one in five is a company.
+        events (int): The number of events.
+        attendees (int): The number of attendees per event.
+        seed (int): The seed of the generator.
+    """
+
+    def __init__(
+        self, accounts: int, events: int = 200, attendees: int = 40, seed: int = 0
+    ):
+        self.accounts = accounts
+        self.events = events
+        self.attendees = attendees
+        self.seed = seed
+        self.account_ids = {"INDIVIDUAL": [], "COMPANY": []}
+        for account_id in range(1, accounts + 1):
+            self.account_ids[self.user_type(account_id)].append(account_id)
+
+    def rng(self, kind: str, id: int) -> random.Random:
+        digest = hashlib.blake2b(
+            f"{self.seed}:{kind}:{id}".encode(), digest_size=8
+        ).digest()
+        return random.Random(int.from_bytes(digest, "big"))
+
+    def user_type(self, account_id: int) -> str:
+        return (
+            "COMPANY" if self.rng("type", account_id).random() < 0.2 else "INDIVIDUAL"
+        )
+
+    def exists(self, account_id: int) -> bool:
+        return 1 <= account_id <= self.accounts
+
+    def listing(self, account_id: int) -> dict:
+        rng = self.rng("account", account_id)
+        user_type = self.user_type(account_id)
+        first_name, last_name = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+        company = f"{rng.choice(COMPANY_WORDS)} {rng.choice(COMPANY_SUFFIXES)}"
+        record = {
+            "accountId": str(account_id),
+            "userType": user_type,
+            "firstName": first_name if user_type == "INDIVIDUAL" else None,
+            "lastName": last_name if user_type == "INDIVIDUAL" else None,
+            "email": (
+                f"{first_name}.{account_id}@example.com".lower()
+                if rng.random() > 0.1
+                else None
+            ),
+            "companyName": (
+                company if user_type == "COMPANY" or rng.random() > 0.5 else None
+            ),
+        }
+        if user_type == "COMPANY":
+            record["primaryContactAccountId"] = str(rng.randint(1, self.accounts))
+        return record
+
+    def details(self, account_id: int) -> dict:
+        rng = self.rng("details", account_id)
+        listing = self.listing(account_id)
+        created = date(2010, 1, 1) + timedelta(days=rng.randint(0, 5000))
+        modified = min(
+            created + timedelta(days=rng.randint(0, 3000)), date(2025, 12, 31)
+        )
+        origin, source = rng.choice(ORIGINS), rng.choice(SOURCES)
+        account = {
+            "accountId": listing["accountId"],
+            "primaryContact": {
+                "firstName": listing["firstName"],
+                "lastName": listing["lastName"],
+                "email1": listing["email"],
+            },
+            "timestamps": {
+                "createdBy": rng.choice(["admin", "import", "web"]),
+                "createdDateTime": created.isoformat() + "T09:30:00Z",
+                "lastModifiedBy": "admin",
+                "lastModifiedDateTime": modified.isoformat() + "T17:45:00Z",
+            },
+            "origin": {"originDetail": origin} if origin else None,
+            "source": {"name": source} if source else None,
+            "noSolicitation": rng.random() < 0.05,
+        }
+        if listing["userType"] == "COMPANY":
+            account["name"] = listing["companyName"]
+            return {"companyAccount": account}
+        return {"individualAccount": account}
+
+    def memberships(self, account_id: int) -> list:
+        rng = self.rng("memberships", account_id)
+        level, fee = rng.choice(MEMBERSHIP_LEVELS)
+        start = date(2015, 1, 1) + timedelta(days=rng.randint(0, 3000))
+        memberships = []
+        for term in range(rng.choice([0, 0, 1, 2, 3, 5])):
+            end = start + timedelta(days=364)
+            memberships.append(
+                {
+                    "id": account_id * 10 + term,
+                    "membershipLevel": {
+                        "id": str(MEMBERSHIP_LEVELS.index((level, fee))),
+                        "name": level,
+                    },
+                    "fee": fee,
+                    "termStartDate": start.isoformat(),
+                    "termEndDate": end.isoformat(),
+                    "transactionDate": (
+                        start - timedelta(days=rng.randint(0, 30))
+                    ).isoformat(),
+                }
+            )
+            start = end + timedelta(days=rng.choice([1, 1, 1, 200]))
+        return memberships
+
+    def event_list(self) -> list:
+        events = []
+        for event_id in range(1, self.events + 1):
+            rng = self.rng("event", event_id)
+            start = date(2018, 1, 1) + timedelta(days=rng.randint(0, 3000))
+            events.append(
+                {
+                    "id": str(event_id),
+                    "name": f"Event {event_id}",
+                    "startDate": start.isoformat(),
+                    "archived": rng.random() < 0.05,
+                }
+            )
+        return events
+
+    def event_attendees(self, event_id: int) -> list:
+        rng = self.rng("attendees", event_id)
+        count = min(self.attendees, self.accounts)
+        return [
+            {"attendeeId": i, "registrantAccountId": str(account_id)}
+            for i, account_id in enumerate(
+                rng.sample(range(1, self.accounts + 1), count)
+            )
+        ]
+
+    def search_result(self, account_id: int, output_fields: list) -> dict:
+        details = next(iter(self.details(account_id).values()))
+        result = {}
+        for name in output_fields:
+            value = details
+            for key in SEARCH_OUTPUT_FIELDS.get(name, ()):
+                value = (value or {}).get(key)
+            result[name] = value
+        return result
+
+
+class ServerBucket:
+    """
+    Server-side request budget: answers 429 once more than `rate` requests per second arrive.
+    """
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._last = time.monotonic()
+
+    def take(self) -> bool:
+        now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._last) * self.rate)
+        self._last = now
+        if self._tokens < 1:
+            return False
+        self._tokens -= 1
+        return True
+
+
+def paginate(records: list, request: web.Request, key: str) -> dict:
+    page = int(request.query.get("currentPage", 0))
+    page_size = int(request.query.get("pageSize", 20))
+    total_pages = max(1, -(-len(records) // page_size))
+    return {
+        key: records[page * page_size : (page + 1) * page_size],
+        "pagination": {
+            "currentPage": page,
+            "pageSize": page_size,
+            "totalPages": total_pages,
+            "totalResults": len(records),
+        },
+    }
+
+
+def create_app(
+    dataset: SyntheticDataset,
+    latency: float = 0.0,
+    error_rate: float = 0.0,
+    rate_limit: float = None,
+    retry_after: float = 1.0,
+    seed: int = 0,
+) -> web.Application:
+    """
+    Creates the aiohttp application serving `dataset`.
+
+    Parameters:
+        dataset (SyntheticDataset): The data to serve.
+        latency (float): The mean delay in seconds before each response
+                         (uniformly jittered by ±50 %).
+        error_rate (float): The fraction of requests answered with a random 500/502/503.
+        rate_limit (float): Requests per second above which the server answers 429
+                            with `Retry-After`. None disables it.
+        retry_after (float): The value of the `Retry-After` header of 429 responses.
+        seed (int): The seed of the latency and error generator.
+
+    Notes:
+        - The application counts the requests it received and answered in `app["stats"]`.
+    """
+    rng = random.Random(seed)
+    bucket = (
+        None
+        if rate_limit is None
+        else ServerBucket(rate_limit, max(1, int(rate_limit)))
+    )
+    stats = {"requests": 0, "errors": 0, "throttled": 0}
+
+    @web.middleware
+    async def faults(request, handler):
+        stats["requests"] += 1
+        if latency:
+            await asyncio.sleep(latency * rng.uniform(0.5, 1.5))
+        if bucket is not None and not bucket.take():
+            stats["throttled"] += 1
+            return web.json_response(
+                {"error": "Too Many Requests"},
+                status=429,
+                headers={"Retry-After": str(retry_after)},
+            )
+        if error_rate and rng.random() < error_rate:
+            stats["errors"] += 1
+            return web.json_response(
+                {"error": "Server Error"}, status=rng.choice([500, 502, 503])
+            )
+        return await handler(request)
+
+    def account_id(request) -> int:
+        account_id = int(request.match_info["id"])
+        if not dataset.exists(account_id):
+            raise web.HTTPNotFound()
+        return account_id
+
+    async def accounts(request):
+        user_type = request.query.get("userType", "INDIVIDUAL")
+        page = paginate(dataset.account_ids.get(user_type, []), request, "accounts")
+        page["accounts"] = [
+            dataset.listing(account_id) for account_id in page["accounts"]
+        ]
+        return web.json_response(page)
+
+    async def account(request):
+        return web.json_response(dataset.details(account_id(request)))
+
+    async def memberships(request):
+        return web.json_response(
+            {"memberships": dataset.memberships(account_id(request))}
+        )
+
+    async def output_fields(request):
+        return web.json_response(
+            {
+                "standardFields": [
+                    {"fieldName": name} for name in SEARCH_OUTPUT_FIELDS
+                ],
+                "customFields": [],
+            }
+        )
+
+    async def search(request):
+        body = await request.json()
+        account_ids = range(1, dataset.accounts + 1)
+        for criterion in body.get("searchFields", []):
+            if criterion["field"] == "Account Type":
+                account_ids = dataset.account_ids[
+                    SEARCH_ACCOUNT_TYPES[criterion["value"]]
+                ]
+            elif criterion["field"] == "Account Last Modified Date":
+                since = criterion["value"]
+                account_ids = [
+                    account_id
+                    for account_id in account_ids
+                    if next(iter(dataset.details(account_id).values()))["timestamps"][
+                        "lastModifiedDateTime"
+                    ][:10]
+                    >= since
+                ]
+        pagination = body.get("pagination", {})
+        page, page_size = pagination.get("currentPage", 0), pagination.get(
+            "pageSize", 20
+        )
+        output = body.get("outputFields", [])
+        results = [
+            dataset.search_result(account_id, output)
+            for account_id in account_ids[page * page_size : (page + 1) * page_size]
+        ]
+        return web.json_response(
+            {
+                "searchResults": results,
+                "pagination": {
+                    "currentPage": page,
+                    "pageSize": page_size,
+                    "totalPages": max(1, -(-len(account_ids) // page_size)),
+                    "totalResults": len(account_ids),
+                },
+            }
+        )
+
+    async def events(request):
+        return web.json_response(paginate(dataset.event_list(), request, "events"))
+
+    async def attendees(request):
+        event_id = int(request.match_info["id"])
+        if not 1 <= event_id <= dataset.events:
+            raise web.HTTPNotFound()
+        return web.json_response({"attendees": dataset.event_attendees(event_id)})
+
+    app = web.Application(middlewares=[faults])
+    app["stats"] = stats
+    app.router.add_get("/v2/accounts", accounts)
+    app.router.add_get("/v2/accounts/search/outputFields", output_fields)
+    app.router.add_post("/v2/accounts/search", search)
+    app.router.add_get("/v2/accounts/{id:\\d+}", account)
+    app.router.add_get("/v2/accounts/{id:\\d+}/memberships", memberships)
+    app.router.add_get("/v2/events", events)
+    app.router.add_get("/v2/events/{id:\\d+}/attendees", attendees)
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--accounts", type=int, default=1000)
+    parser.add_argument("--events", type=int, default=200)
+    parser.add_argument("--attendees", type=int, default=40)
+    parser.add_argument(
+        "--latency", type=float, default=0.0, help="mean response delay in seconds"
+    )
+    parser.add_argument(
+        "--error-rate",
+        type=float,
+        default=0.0,
+        help="fraction of requests answered with 5xx",
+    )
+    parser.add_argument(
+        "--rate-limit",
+        type=float,
+        default=None,
+        help="requests per second before answering 429",
+    )
+    parser.add_argument("--retry-after", type=float, default=1.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    dataset = SyntheticDataset(args.accounts, args.events, args.attendees, args.seed)
+    app = create_app(
+        dataset,
+        args.latency,
+        args.error_rate,
+        args.rate_limit,
+        args.retry_after,
+        args.seed,
+    )
+    print(
+        f"Serving {args.accounts} synthetic accounts on http://127.0.0.1:{args.port}/v2",
+        flush=True,
+    )
+    web.run_app(app, host="127.0.0.1", port=args.port, print=None)
+
+
+if __name__ == "__main__":
+    main()
@@ -27,20 +27,15 @@ def generate_report():
     with open("report/menu.json") as f:
         menu_json = json.load(f)
 
-    individuals_df = pd.read_csv("individuals.csv")
-    companies_df = pd.read_csv("companies.csv")
+    individuals_df = load_dataset("individuals").accounts
+    companies_df = load_dataset("companies").accounts
 
-    individual_members = get_members(individuals_df)
-    company_members = get_members(companies_df)
+    # Every account is labelled with its segments once; the per-segment metrics are computed from these labels
+    individual_segments = get_segments(individuals_df)
+    company_segments = get_segments(companies_df)
 
-    individual_non_members = get_non_members(individuals_df)
-    company_non_members = get_non_members(companies_df)
-
-    individual_past_members = get_past_members(individuals_df)
-    company_past_members = get_past_members(companies_df)
-
-    all_individual_members = pd.concat([individual_members, individual_past_members])
-    all_company_members = pd.concat([company_members, company_past_members])
+    individual_members = get_segment(individuals_df, individual_segments, "members")
+    company_members = get_segment(companies_df, company_segments, "members")
 
     menu_json["data"]["individuals"]["feeVsMembers"]["members"]["data"] = (
         fee_vs_member_type(individual_members)
@@ -56,46 +51,27 @@ def generate_report():
         membership_type_vs_events(companies_df)
     )
 
-    menu_json["data"]["individuals"]["incompleteData"]["members"]["data"] = (
-        get_plotly_list_nan_values(
-            individual_members, quality_columns_individuals, "individuals"
-        )
-    )
-    menu_json["data"]["organizations"]["incompleteData"]["members"]["data"] = (
-        get_plotly_list_nan_values(
-            company_members, quality_columns_companies, "organizations"
-        )
+    individual_nan_values = get_plotly_list_nan_values_by_segment(
+        individuals_df, individual_segments, quality_columns_individuals, "individuals"
     )
-    menu_json["data"]["individuals"]["incompleteData"]["nonMembers"]["data"] = (
-        get_plotly_list_nan_values(
-            individual_non_members, quality_columns_individuals, "individuals"
-        )
+    company_nan_values = get_plotly_list_nan_values_by_segment(
+        companies_df, company_segments, quality_columns_companies, "organizations"
     )
-    menu_json["data"]["organizations"]["incompleteData"]["nonMembers"]["data"] = (
-        get_plotly_list_nan_values(
-            company_non_members, quality_columns_companies, "organizations"
+    for segment in ["members", "nonMembers", "all"]:
+        menu_json["data"]["individuals"]["incompleteData"][segment]["data"] = (
+            individual_nan_values[segment]
         )
-    )
-    menu_json["data"]["individuals"]["incompleteData"]["all"]["data"] = (
-        get_plotly_list_nan_values(
-            individuals_df, quality_columns_individuals, "individuals"
+        menu_json["data"]["organizations"]["incompleteData"][segment]["data"] = (
+            company_nan_values[segment]
         )
-    )
-    menu_json["data"]["organizations"]["incompleteData"]["all"]["data"] = (
-        get_plotly_list_nan_values(
-            companies_df, quality_columns_companies, "organizations"
-        )
-    )
 
-    menu_json["data"]["individuals"]["inconsistantData"]["members"]["data"] = (
-        get_name_inconsistencies(individual_members)
-    )
-    menu_json["data"]["individuals"]["inconsistantData"]["nonMembers"]["data"] = (
-        get_name_inconsistencies(individual_non_members)
-    )
-    menu_json["data"]["individuals"]["inconsistantData"]["all"]["data"] = (
-        get_name_inconsistencies(individuals_df)
+    name_inconsistencies = get_name_inconsistencies_by_segment(
+        individuals_df, individual_segments
     )
+    for segment in ["members", "nonMembers", "all"]:
+        menu_json["data"]["individuals"]["inconsistantData"][segment]["data"] = (
+            name_inconsistencies[segment]
+        )
 
     menu_json["data"]["individuals"]["termEndDecember31"]["members"]["data"] = (
         get_31_dec_term_end_table_plot(individual_members, "individuals")
@@ -105,28 +81,35 @@ def generate_report():
         get_31_dec_term_end_table_plot(company_members, "organizations")
     )
 
+    individual_creation_dates = get_account_creation_date_plot_by_segment(
+        individuals_df, individual_segments
+    )
+    company_creation_dates = get_account_creation_date_plot_by_segment(
+        companies_df, company_segments
+    )
+
     menu_json["data"]["individuals"]["memberCreationDate"]["members"]["data"] = (
-        get_account_creation_date_plot(all_individual_members)
+        individual_creation_dates["both"]
     )
 
     menu_json["data"]["organizations"]["memberCreationDate"]["members"]["data"] = (
-        get_account_creation_date_plot(company_members)
+        company_creation_dates["members"]
     )
 
     menu_json["data"]["individuals"]["memberCreationDate"]["pastMembers"]["data"] = (
-        get_account_creation_date_plot(individual_past_members)
+        individual_creation_dates["pastMembers"]
     )
 
     menu_json["data"]["organizations"]["memberCreationDate"]["pastMembers"]["data"] = (
-        get_account_creation_date_plot(company_past_members)
+        company_creation_dates["pastMembers"]
     )
 
     menu_json["data"]["individuals"]["memberCreationDate"]["both"]["data"] = (
-        get_account_creation_date_plot(all_individual_members)
+        individual_creation_dates["both"]
     )
 
     menu_json["data"]["organizations"]["memberCreationDate"]["both"]["data"] = (
-        get_account_creation_date_plot(all_company_members)
+        company_creation_dates["both"]
     )
 
     menu_json["data"]["individuals"]["totalIncome"]["members"]["data"] = (
@@ -136,6 +119,13 @@ def generate_report():
         total_income_by_member_type_ploty(company_members)
     )
 
+    menu_json["data"]["individuals"]["duplicateAccounts"]["all"]["data"] = (
+        get_duplicate_accounts(individuals_df, "individual")
+    )
+    menu_json["data"]["organizations"]["duplicateAccounts"]["all"]["data"] = (
+        get_duplicate_accounts(companies_df, "company")
+    )
+
     rendered_html = template.render(export_date=export_date, data=menu_json["data"])
     print(menu_json)
     # Save the rendered HTML to a file
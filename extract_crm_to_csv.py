@@ -1,507 +1,1308 @@
 import logging.config
 from datetime import date
 from datetime import datetime
+from datetime import timedelta
 
+import argparse
+import asyncio
+import contextlib
+import hashlib
+import json
 import logging
 import os
+import random
+import re
 import pandas as pd
 import numpy as np
-import requests
+import aiohttp
+import pyarrow as pa
+import pyarrow.parquet as pq
 from dotenv import load_dotenv
-from requests.auth import HTTPBasicAuth
-import concurrent.futures
+import threading
 import time
+from collections import deque
+from typing import Optional
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlsplit
+
+from storage import AccountSnapshot, AttendeeStore, ExtractionJournal, ResponseCache
 
 # loading logger
 logging.config.fileConfig("NeonCRMAnalytics.log")
 
 # loading variables from .env file
 load_dotenv()
-auth = HTTPBasicAuth(os.getenv("API_ORG_ID"), os.getenv("API_API_KEY"))
 
 logging.debug(os.getenv("API_ORG_ID"))
 
 # Configurable global variables
 API_BASE_URL = "https://api.neoncrm.com/v2"
-API_LIMIT = 5000
+API_PAGE_SIZE = 500  # records per page of paginated list endpoints
 API_VERSION = "2.8"
-MAX_WORKERS = 4
-API_TIMEOUT = 0.5
+MAX_CONCURRENCY = 100
+# accounts enriched at the same time, shared round-robin by the individual and company pipelines
+ACCOUNT_SLOTS = MAX_CONCURRENCY // 2
+API_RATE_LIMIT = 8.0  # sustained requests per second, shared by all workers
+API_BURST = 16  # requests that may be sent back-to-back before throttling kicks in
+RATE_LIMITED_STATUSES = (429, 503)
+REQUEST_TIMEOUT = 60  # seconds before a single request is abandoned and retried
+MAX_ATTEMPTS = 5  # attempts per request before it is given up
+RETRY_BASE_DELAY = 1.0  # seconds, doubled after every failed attempt
+RETRY_MAX_DELAY = 30.0
+ERROR_BUDGET = 200  # failed attempts tolerated over the whole run before it is aborted
+RETRYABLE_STATUSES = (408, 425, 429, 500, 502, 503, 504)
+FATAL_STATUSES = (401, 403)  # retrying or continuing the run cannot succeed
+FAILURE_REPORT = "failed_requests.csv"
+METRICS_JSON = "run_metrics.json"  # per-endpoint request telemetry and stage durations of the last run
+METRICS_PROMETHEUS = "run_metrics.prom"  # the same numbers in Prometheus text format
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)  # seconds
+# long-format history of all memberships of all accounts
+MEMBERSHIPS_TABLE = "memberships.parquet"
+# "Membership Type" of accounts whose memberships could not be fetched
+UNKNOWN_MEMBERSHIP = "Unknown"
+# Arrow types of the account tables ("individuals.parquet", "companies.parquet") written next to the CSV files.
+# Columns not listed keep the type inferred from the DataFrame.
+ACCOUNT_COLUMN_TYPES = {
+    "event_ids": pa.list_(pa.int64()),
+    "userType": pa.dictionary(pa.int32(), pa.string()),
+    "Membership Type": pa.dictionary(pa.int32(), pa.string()),
+    "Fee": pa.float64(),
+    "Term End Date": pa.timestamp("us"),
+    "Transaction Date": pa.timestamp("us"),
+    "timestamps.createdDateTime": pa.timestamp("us", tz="UTC"),
+    "timestamps.lastModifiedDateTime": pa.timestamp("us", tz="UTC"),
+    "Export Date": pa.timestamp("us"),
+}
+USE_CACHE = True
+CACHE_PATH = ".neoncrm/http_cache.sqlite"
+CACHE_MAX_BYTES = 512 * 1024 * 1024
+# (URL path pattern, seconds a cached response is used without asking the server), first match wins.
+# Expired responses are revalidated with ETag/Last-Modified where the API sends them.
+CACHE_TTLS = [
+    (r"/accounts/\d+/memberships$", 12 * 3600),
+    (r"/accounts/\d+$", 12 * 3600),
+    (r"/events/\d+/attendees$", 12 * 3600),
+    (r"/accounts$", 3600),
+    (r"/events$", 3600),
+]
+USE_ATTENDEE_STORE = True
+ATTENDEE_STORE_PATH = ".neoncrm/attendees.sqlite"
+# attendance of events that started longer ago is never refetched
+ATTENDEES_FINAL_AFTER_DAYS = 90
+REFRESH_ATTENDEES = False  # refetch final events too (the store is still updated)
+USE_SNAPSHOT = True
+SNAPSHOT_PATH = ".neoncrm/snapshot.sqlite"
+# Search field of POST /accounts/search used to find accounts modified since the last run
+# (see GET /accounts/search/searchFields for the names available to the organization)
+SEARCH_FIELD_LAST_MODIFIED = "Account Last Modified Date"
+SEARCH_PAGE_SIZE = 200
+BULK_DETAILS = False  # take account details from paginated searches instead of one request per account
+# Output fields of POST /accounts/search and the account detail columns they fill in bulk mode
+# (see GET /accounts/search/outputFields for the names available to the organization)
+DETAIL_SEARCH_FIELDS = {
+    "Account ID": "accountId",
+    "Account Created Date/Time": "timestamps.createdDateTime",
+    "Account Created By": "timestamps.createdBy",
+    "Account Last Modified Date/Time": "timestamps.lastModifiedDateTime",
+    "Account Last Modified By": "timestamps.lastModifiedBy",
+    "Origin Detail": "origin.originDetail",
+    "Source": "source.name",
+    "Email 1": "primaryContact.email1",
+}
+# accounts fetched one by one in bulk mode to check that the search fills every column of their details
+DETAIL_PROBE_ACCOUNTS = 20
+SEARCH_FIELD_ACCOUNT_TYPE = "Account Type"
+SEARCH_ACCOUNT_TYPES = {"INDIVIDUAL": "Individual", "COMPANY": "Company"}
+NORMALIZE_BATCH_SIZE = 5000  # account details flattened per pd.json_normalize call
+JOURNAL_PATH = ".neoncrm/journal.jsonl"
+JOURNAL_FSYNC_EVERY = 200  # records written between two fsyncs of the journal
+
+
+class TokenBucket:
+    """
+    Process-wide token bucket that paces the requests of every worker thread and coroutine.
+
+    Parameters:
+        rate (float): The number of tokens added per second (sustained request rate).
+        burst (int): The maximum number of tokens the bucket can hold (burst size).
 
+    Behavior:
+        - `reserve` takes one token and returns how long the caller has to wait before sending its request.
+          Tokens may go negative, in which case later callers queue up behind earlier ones.
+        - `pause` stops all traffic for the given number of seconds, e.g. when the server answers
+          with `Retry-After`. Tokens accrued before the pause are discarded.
+        - The bucket never sleeps itself, so the same instance serves `time.sleep` (threads)
+          and `asyncio.sleep` (coroutines).
+    """
 
-def get_request(url: str, return_key: str) -> dict:
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self) -> float:
+        with self._lock:
+            now = time.monotonic()
+            if now > self._last:
+                self._tokens = min(
+                    self.burst, self._tokens + (now - self._last) * self.rate
+                )
+                self._last = now
+            self._tokens -= 1
+            # _last lies in the future while the bucket is paused
+            wait = self._last - now
+            if self._tokens < 0:
+                wait += -self._tokens / self.rate
+            return wait
+
+    def pause(self, seconds: float) -> None:
+        with self._lock:
+            resume_at = time.monotonic() + seconds
+            if resume_at > self._last:
+                self._tokens = min(self._tokens, 0.0)
+                self._last = resume_at
+
+
+rate_limiter = TokenBucket(API_RATE_LIMIT, API_BURST)
+
+
+def parse_retry_after(value) -> Optional[float]:
     """
-    Sends a GET request to the specified URL with the required headers and authentication,
-    and returns the JSON response.
+    Converts the value of a `Retry-After` header into a number of seconds.
 
     Parameters:
-        url (str): The URL to which the GET request will be sent.
+        value (str): The header value, either a number of seconds or an HTTP date. May be None.
 
     Returns:
-        dict: The JSON response from the server.
+        Optional[float]: The number of seconds to wait, or None if the header is missing or malformed.
+    """
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, retry_at.timestamp() - time.time())
+
+
+class RequestFailedError(Exception):
+    """
+    Raised when a single request is given up, either because its status is not retryable
+    or because it failed `MAX_ATTEMPTS` times. The run continues without this resource.
+    """
 
-    Behavior:
-        - Sends a GET request to the given URL with the following:
-            - Headers:
-                - "NEON-API-VERSION": Version of the API, set by the global variable `API_VERSION`.
-                - "Content-Type": "application/json" to specify that the content is in JSON format.
-            - Payload: An empty dictionary, as no payload is needed for a GET request.
-            - Authentication: Set by the global variable `auth`.
-        - Measures the time taken for the API request and compares it with a predefined timeout (`API_TIMEOUT`).
-        - If the request completes faster than `API_TIMEOUT`, the function waits for the remaining duration to ensure a consistent pacing of API requests.
-        - The function returns the JSON response received from the server.
+    def __init__(self, url: str, reason: str):
+        super().__init__(f"{url}: {reason}")
+        self.url = url
+        self.reason = reason
+
+
+class FatalRequestError(RuntimeError):
+    """
+    Raised when the whole run has to be aborted, e.g. on invalid credentials.
     """
-    while True:
-        headers = {
-            "NEON-API-VERSION": str(API_VERSION),
-            "Content-Type": "application/json",
-        }
-        t1 = time.time()
-        try:
-            api_response = requests.request("GET", url, headers=headers, auth=auth)
-            api_response.raise_for_status()
-
-            if not api_response.content:
-                logging.error(f"Empty API response, retrying...")
-                time.sleep(1)
-                continue
-
-            t2 = time.time()
-            duration = t2 - t1
-            if duration < API_TIMEOUT:
-                time.sleep(API_TIMEOUT - duration)
-
-            try:
-                res = api_response.json()
-
-            except ValueError:
-                logging.error(f"Response is not in JSON format, retrying...")
-                time.sleep(1)
-                continue
-            if type(res) == dict:
-                return res[return_key]
-            else:
-                logging.error(f"Error in API request: {res}, retrying...")
-                time.sleep(1)
-                continue
 
-        except requests.exceptions.HTTPError as err:
-            logging.error(
-                f"HTTP error occurred: {err} retrying...",
-            )
-            time.sleep(1)
-            continue
 
+class ErrorBudgetExhausted(FatalRequestError):
+    """
+    Raised once the run has used up its `ERROR_BUDGET` of failed attempts.
+    """
 
-def get_accounts_companies() -> pd.DataFrame:
+
+class RetryPolicy:
     """
-    Fetches a list of company accounts from the API and returns it as a normalized pandas DataFrame.
+    Decides whether and when a failed request is retried.
 
-    Returns:
-        pd.DataFrame: A DataFrame containing the normalized data of company accounts.
+    Parameters:
+        max_attempts (int): The maximum number of attempts per request.
+        base_delay (float): The backoff ceiling in seconds after the first failed attempt.
+        max_delay (float): The upper bound of the backoff ceiling in seconds.
+        error_budget (int): The number of failed attempts tolerated over the whole run.
+        retryable_statuses (tuple): HTTP statuses worth retrying (throttling, server errors).
+        fatal_statuses (tuple): HTTP statuses that abort the whole run.
 
     Behavior:
-        - Constructs the URL to fetch company accounts from the API using the base URL (`API_BASE_URL`) and the `API_LIMIT` to specify the maximum number of records to retrieve.
-        - Calls the `get_request` function to send a GET request to the constructed URL.
-        - Logs the API response at the debug level for troubleshooting purposes.
-        - Normalizes the JSON response's "accounts" data and converts it into a pandas DataFrame for easier data manipulation and analysis.
+        - `classify` returns "retry", "fatal" or "fail" for an HTTP status. Statuses that are
+          neither retryable nor fatal (e.g. 404 for a deleted account) fail only the request.
+        - `backoff` returns an exponential delay with full jitter, so workers that failed at the same
+          time do not retry in lockstep.
+        - `record_error` counts a failed attempt against the run-wide budget and raises
+          `ErrorBudgetExhausted` once it is used up; `check_budget` raises from then on.
     """
-    url = API_BASE_URL + "/accounts?userType=COMPANY&pageSize=" + str(API_LIMIT)
 
-    response = get_request(url, "accounts")
-    logging.debug("All companies received!")
-    return pd.json_normalize(response)
+    def __init__(
+        self,
+        max_attempts: int,
+        base_delay: float,
+        max_delay: float,
+        error_budget: int,
+        retryable_statuses: tuple,
+        fatal_statuses: tuple,
+    ):
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.error_budget = error_budget
+        self.retryable_statuses = retryable_statuses
+        self.fatal_statuses = fatal_statuses
+        self.errors = 0
+        self._lock = threading.Lock()
+
+    def classify(self, status: int) -> str:
+        if status in self.fatal_statuses:
+            return "fatal"
+        if status in self.retryable_statuses:
+            return "retry"
+        return "fail"
+
+    def backoff(self, attempt: int) -> float:
+        ceiling = min(self.max_delay, self.base_delay * 2 ** (attempt - 1))
+        return random.uniform(0, ceiling)
+
+    def check_budget(self) -> None:
+        if self.errors > self.error_budget:
+            raise ErrorBudgetExhausted(
+                f"More than {self.error_budget} failed requests, aborting the run"
+            )
+
+    def record_error(self) -> None:
+        with self._lock:
+            self.errors += 1
+        self.check_budget()
+
+
+retry_policy = RetryPolicy(
+    MAX_ATTEMPTS,
+    RETRY_BASE_DELAY,
+    RETRY_MAX_DELAY,
+    ERROR_BUDGET,
+    RETRYABLE_STATUSES,
+    FATAL_STATUSES,
+)
+dead_letters = []
 
 
-def get_accounts_individuals() -> pd.DataFrame:
+def endpoint_label(method: str, url: str) -> str:
     """
-    Fetches a list of individual user accounts from the API and returns it as a normalized pandas DataFrame.
+    Returns the endpoint of a request with IDs replaced by a placeholder, e.g. "GET /accounts/{id}/memberships".
+    """
+    path = urlsplit(url).path
+    if path.startswith(urlsplit(API_BASE_URL).path):
+        path = path[len(urlsplit(API_BASE_URL).path) :]
+    return method + " " + re.sub(r"/\d+(?=/|$)", "/{id}", path)
 
-    Returns:
-        pd.DataFrame: A DataFrame containing the normalized data of individual user accounts.
+
+class RunMetrics:
+    """
+    Collects the request telemetry of one extraction run, shared by all worker threads and coroutines.
+
+    Parameters:
+        buckets (tuple): The upper bounds in seconds of the latency histogram buckets.
 
     Behavior:
-        - Constructs the URL to fetch individual user accounts from the API using the base URL (`API_BASE_URL`) and the `API_LIMIT` to specify the maximum number of records to retrieve.
-        - Calls the `get_request` function to send a GET request to the constructed URL.
-        - Logs the API response at the debug level for troubleshooting purposes.
-        - Normalizes the JSON response's "accounts" data and converts it into a pandas DataFrame for easier data manipulation and analysis.
+        - `observe_request` counts a request sent to the API by endpoint and status, adds its latency to the
+          endpoint's histogram and its response size to the transferred bytes.
+        - `count_cache_hit` counts a response served from the cache without a request.
+        - `count_failure` counts a failed attempt by endpoint and status ("connection" if there was no response).
+        - `add_wait` adds time spent sleeping, either for the `rate_limiter` ("rate_limit") or before a retry ("backoff").
+          Waits of concurrent requests add up, so they can exceed the duration of the run.
+        - `stage` is a context manager that adds the duration of a pipeline stage; stages may overlap.
+        - `write` stores everything as JSON and in Prometheus text format.
     """
-    url = API_BASE_URL + "/accounts?userType=INDIVIDUAL&pageSize=" + str(API_LIMIT)
 
-    response = get_request(url, "accounts")
-    logging.debug("All individuals received!")
-    return pd.json_normalize(response)
+    def __init__(self, buckets: tuple):
+        self.buckets = buckets
+        self.requests = {}
+        self.latencies = {}
+        self.bytes = {}
+        self.cache_hits = {}
+        self.failures = {}
+        self.waits = {"rate_limit": 0.0, "backoff": 0.0}
+        self.stages = {}
+        self._lock = threading.Lock()
+
+    def observe_request(
+        self, method: str, url: str, status, seconds: float, size: int
+    ) -> None:
+        endpoint = endpoint_label(method, url)
+        with self._lock:
+            key = (endpoint, str(status))
+            self.requests[key] = self.requests.get(key, 0) + 1
+            histogram = self.latencies.setdefault(
+                endpoint, {"counts": [0] * (len(self.buckets) + 1), "sum": 0.0}
+            )
+            index = next(
+                (i for i, bound in enumerate(self.buckets) if seconds <= bound),
+                len(self.buckets),
+            )
+            histogram["counts"][index] += 1
+            histogram["sum"] += seconds
+            self.bytes[endpoint] = self.bytes.get(endpoint, 0) + size
+
+    def count_cache_hit(self, method: str, url: str) -> None:
+        endpoint = endpoint_label(method, url)
+        with self._lock:
+            self.cache_hits[endpoint] = self.cache_hits.get(endpoint, 0) + 1
+
+    def count_failure(self, method: str, url: str, status) -> None:
+        key = (
+            endpoint_label(method, url),
+            "connection" if status is None else str(status),
+        )
+        with self._lock:
+            self.failures[key] = self.failures.get(key, 0) + 1
+
+    def add_wait(self, kind: str, seconds: float) -> None:
+        with self._lock:
+            self.waits[kind] += seconds
+
+    @contextlib.contextmanager
+    def stage(self, name: str):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            with self._lock:
+                self.stages[name] = (
+                    self.stages.get(name, 0.0) + time.perf_counter() - started
+                )
+
+    def to_dict(self) -> dict:
+        with self._lock:
+            endpoints = sorted(
+                {endpoint for endpoint, _ in self.requests}
+                | set(self.cache_hits)
+                | {endpoint for endpoint, _ in self.failures}
+            )
+            return {
+                "endpoints": {
+                    endpoint: {
+                        "requests": {
+                            status: count
+                            for (name, status), count in sorted(self.requests.items())
+                            if name == endpoint
+                        },
+                        "failures": {
+                            status: count
+                            for (name, status), count in sorted(self.failures.items())
+                            if name == endpoint
+                        },
+                        "cache_hits": self.cache_hits.get(endpoint, 0),
+                        "bytes": self.bytes.get(endpoint, 0),
+                        "latency": {
+                            "buckets": list(self.buckets),
+                            "counts": list(
+                                self.latencies.get(endpoint, {}).get(
+                                    "counts", [0] * (len(self.buckets) + 1)
+                                )
+                            ),
+                            "sum": self.latencies.get(endpoint, {}).get("sum", 0.0),
+                        },
+                    }
+                    for endpoint in endpoints
+                },
+                "wait_seconds": dict(self.waits),
+                "stage_seconds": dict(self.stages),
+            }
+
+    def to_prometheus(self, prefix: str = "neoncrm_extract") -> str:
+        metrics = self.to_dict()
+
+        def labels(**values):
+            escaped = (
+                str(value)
+                .replace("\\", "\\\\")
+                .replace('"', '\\"')
+                .replace("\n", "\\n")
+                for value in values.values()
+            )
+            return (
+                "{"
+                + ",".join(f'{key}="{value}"' for key, value in zip(values, escaped))
+                + "}"
+            )
+
+        lines = []
 
+        def family(name, kind, help, samples):
+            lines.append(f"# HELP {prefix}_{name} {help}")
+            lines.append(f"# TYPE {prefix}_{name} {kind}")
+            lines.extend(
+                f"{prefix}_{name}{suffix} {value}" for suffix, value in samples
+            )
 
-def get_accounts_additional_information(
-    account_id, account_type, actual_type
-) -> pd.DataFrame:
+        endpoints = metrics["endpoints"]
+        family(
+            "requests_total",
+            "counter",
+            "Requests sent to the API by endpoint and HTTP status.",
+            [
+                (labels(endpoint=endpoint, status=status), count)
+                for endpoint, data in endpoints.items()
+                for status, count in data["requests"].items()
+            ],
+        )
+        family(
+            "failed_attempts_total",
+            "counter",
+            "Failed attempts by endpoint and HTTP status.",
+            [
+                (labels(endpoint=endpoint, status=status), count)
+                for endpoint, data in endpoints.items()
+                for status, count in data["failures"].items()
+            ],
+        )
+        family(
+            "cache_hits_total",
+            "counter",
+            "Responses served from the cache without a request.",
+            [
+                (labels(endpoint=endpoint), data["cache_hits"])
+                for endpoint, data in endpoints.items()
+            ],
+        )
+        family(
+            "response_bytes_total",
+            "counter",
+            "Bytes of response bodies received by endpoint.",
+            [
+                (labels(endpoint=endpoint), data["bytes"])
+                for endpoint, data in endpoints.items()
+            ],
+        )
+        samples = []
+        for endpoint, data in endpoints.items():
+            cumulative = 0
+            for bound, count in zip(
+                list(self.buckets) + ["+Inf"], data["latency"]["counts"]
+            ):
+                cumulative += count
+                samples.append(
+                    ("_bucket" + labels(endpoint=endpoint, le=bound), cumulative)
+                )
+            samples.append(("_sum" + labels(endpoint=endpoint), data["latency"]["sum"]))
+            samples.append(("_count" + labels(endpoint=endpoint), cumulative))
+        family(
+            "request_duration_seconds",
+            "histogram",
+            "Latency of the requests sent to the API.",
+            samples,
+        )
+        family(
+            "wait_seconds_total",
+            "counter",
+            "Time spent sleeping for the rate limiter or before retries.",
+            [
+                (labels(kind=kind), seconds)
+                for kind, seconds in metrics["wait_seconds"].items()
+            ],
+        )
+        family(
+            "stage_duration_seconds",
+            "gauge",
+            "Duration of the pipeline stages.",
+            [
+                (labels(stage=stage), seconds)
+                for stage, seconds in metrics["stage_seconds"].items()
+            ],
+        )
+        return "\n".join(lines) + "\n"
+
+    def write(self, json_path: str, prometheus_path: str) -> None:
+        with open(json_path, "w") as f:
+            json.dump(self.to_dict(), f, indent=2)
+        with open(prometheus_path, "w") as f:
+            f.write(self.to_prometheus())
+
+
+run_metrics = RunMetrics(LATENCY_BUCKETS)
+
+
+def next_retry_delay(
+    url: str,
+    attempt: int,
+    reason: str,
+    status: int = None,
+    headers=None,
+    method: str = "GET",
+) -> float:
     """
-    Fetches additional information for a specific account based on its ID and type,
-    and returns it as a normalized pandas DataFrame.
+    Handles a failed attempt of `api_request_async` according to `retry_policy`.
 
     Parameters:
-        account_id (str or int): The unique identifier for the account.
-        account_type (str): The expected type of the account ("COMPANY" or "INDIVIDUAL").
-        actual_type (str): The actual type of the account as returned by the API ("COMPANY" or "INDIVIDUAL").
+        url (str): The requested URL.
+        attempt (int): The number of the attempt that failed, starting at 1.
+        reason (str): A description of the failure for the log.
+        status (int): The HTTP status of the response, or None if no valid response was received.
+        headers (Mapping): The response headers, used to honour `Retry-After`.
+        method (str): The HTTP method of the request, for `run_metrics`.
 
     Returns:
-        pd.DataFrame: A DataFrame containing the additional account information.
-                     If the `account_type` does not match the `actual_type`,
-                     a DataFrame with only the `accountId` is returned.
-                     If the `actual_type` is neither "COMPANY" nor "INDIVIDUAL", a ValueError is raised.
+        float: The number of seconds to wait before the next attempt.
 
-    Behavior:
-        - Logs a debug message indicating the retrieval of additional information for the specified account ID.
-        - Constructs the URL to fetch account information based on the given `account_id`.
-        - Calls the `get_request` function to send a GET request to the constructed URL and retrieves the response.
-        - Based on the `actual_type`:
-            - If `actual_type` is "INDIVIDUAL" and `account_type` matches, it normalizes and returns the "individualAccount" data.
-            - If `actual_type` is "COMPANY" and `account_type` matches, it normalizes and returns the "companyAccount" data.
-            - If there is a mismatch between `account_type` and `actual_type`, it returns a DataFrame with only the `accountId`.
-        - Raises a `ValueError` if `actual_type` is not "COMPANY" or "INDIVIDUAL".
+    Raises:
+        FatalRequestError: If the status is fatal or the run-wide error budget is used up.
+        RequestFailedError: If the status is not retryable or the request ran out of attempts.
     """
-    logging.debug("Getting accounts additional information for " + str(account_id))
-    url = API_BASE_URL + "/accounts/" + str(account_id)
+    logging.error(f"{reason} (attempt {attempt}/{retry_policy.max_attempts})")
+    run_metrics.count_failure(method, url, status)
+    retry_policy.record_error()
+    if status is not None:
+        kind = retry_policy.classify(status)
+        if kind == "fatal":
+            raise FatalRequestError(f"{url}: {reason}")
+        if kind == "fail":
+            raise RequestFailedError(url, reason)
+    if attempt >= retry_policy.max_attempts:
+        raise RequestFailedError(url, reason)
+    if status in RATE_LIMITED_STATUSES and headers is not None:
+        retry_after = parse_retry_after(headers.get("Retry-After"))
+        if retry_after is not None:
+            # the whole rate limiter waits, the next reservation absorbs the pause
+            rate_limiter.pause(retry_after)
+            return 0.0
+    return retry_policy.backoff(attempt)
+
+
+def decode_response(content: bytes, return_key: str):
+    """
+    Decodes the body of an API response and returns the value stored under `return_key`
+    (or the whole JSON object if `return_key` is None).
 
-    if actual_type == "INDIVIDUAL":
-        if account_type == "COMPANY":
-            return pd.DataFrame({"accountId": [account_id]})
-        response = get_request(url, "individualAccount")
-        additional_information = pd.json_normalize(response)
-    elif actual_type == "COMPANY":
-        if account_type == "INDIVIDUAL":
-            return pd.DataFrame({"accountId": [account_id]})
-        response = get_request(url, "companyAccount")
-        additional_information = pd.json_normalize(response)
-    else:
-        raise ValueError("Invalid account type")
+    Raises:
+        ValueError: If the body is empty, not JSON, or not a JSON object.
+    """
+    if not content:
+        raise ValueError("Empty API response")
+    try:
+        res = json.loads(content)
+    except ValueError:
+        raise ValueError("Response is not in JSON format")
+    if type(res) != dict:
+        raise ValueError(f"Error in API request: {res}")
+    if return_key is None:
+        return res
+    return res[return_key]
+
+
+def record_dead_letter(stage: str, id, error: RequestFailedError) -> None:
+    """
+    Records a resource that could not be fetched, so the run can finish with partial data.
+
+    Parameters:
+        stage (str): The extraction stage, e.g. "memberships", "details" or "attendees".
+        id (str or int): The account or event ID the request was made for.
+        error (RequestFailedError): The error that made the request give up.
+    """
+    logging.error(f"Giving up on {stage} of {id}: {error.reason}")
+    dead_letters.append(
+        {"stage": stage, "id": id, "url": error.url, "reason": error.reason}
+    )
 
-    return additional_information
+
+def write_failure_report() -> None:
+    """
+    Writes all dead letters of the run to `FAILURE_REPORT` and logs a summary per stage.
+    """
+    if not dead_letters:
+        logging.info("All requests succeeded")
+        return
+    report = pd.DataFrame(dead_letters)
+    report.to_csv(FAILURE_REPORT, index=False, header=True)
+    for stage, count in report["stage"].value_counts().items():
+        logging.error(f"{count} {stage} requests failed")
+    logging.error(f"{len(report)} resources could not be fetched, see {FAILURE_REPORT}")
 
 
-def get_accounts_type(account: pd.Series) -> tuple:
+def write_run_metrics() -> None:
+    """
+    Writes the request telemetry of the run (`run_metrics`) to `METRICS_JSON` and `METRICS_PROMETHEUS`.
     """
-    Determines the membership type and associated fee for a given account, based on its active memberships.
+    run_metrics.write(METRICS_JSON, METRICS_PROMETHEUS)
+    logging.info(f"Wrote the run metrics to {METRICS_JSON} and {METRICS_PROMETHEUS}")
+
+
+def build_api_headers() -> dict:
+    """
+    Returns the static headers sent with every NeonCRM request.
+    """
+    return {
+        "NEON-API-VERSION": str(API_VERSION),
+        "Content-Type": "application/json",
+    }
+
+
+_session_lock = threading.Lock()
+_response_cache = None
+_attendee_store = None
+_snapshot = None
+_journal = None
+connection_stats = {"requests": 0, "new_connections": 0, "reused_connections": 0}
+
+
+def _count_connection_event(key: str):
+    async def on_event(session, trace_config_ctx, params):
+        connection_stats[key] += 1
+
+    return on_event
 
-    Parameters:
-        account (pd.Series): A pandas Series containing account information,
-                             including at least the "accountId" field.
+
+def create_async_session() -> aiohttp.ClientSession:
+    """
+    Creates the keep-alive aiohttp session used by the asyncio extraction engine.
 
     Returns:
-        tuple: A tuple containing:
-               - account_id (str): The ID of the account.
-               - membership_level (str): The name of the active membership level.
-                                        If no active membership is found, returns "No Membership active".
-               - fee (str): The fee associated with the active membership.
-                            If no active membership is found, returns "0.0".
-               - termEndDate (str): The end date of the active membership.
-                                      If no active membership is found, returns np.nan.
-               - transactionDate (str): The transaction date of the active membership.
-                                         If no active membership is found, returns np.nan.
-               - totalMemberships (int): The total number of memberships.
-                                            If no active membership is found, returns 0.
+        aiohttp.ClientSession: A session with the API headers and credentials of the `.env` file preset.
 
-    Behavior:
-        - Extracts the `account_id` from the given pandas Series.
-        - Logs a debug message indicating that it is retrieving the account type for the specified `account_id`.
-        - Constructs the API URL to fetch the membership information for the account.
-        - Calls the `get_request` function to send a GET request to the constructed URL and retrieves the response.
-        - Normalizes the JSON response's "memberships" data into a pandas DataFrame.
-        - Iterates through the memberships:
-            - Converts the membership's `termEndDate` into a date object and checks if it is in the future.
-            - If an active membership is found (i.e., the current date is before `termEndDate`), returns the `account_id`, membership level name, and associated fee.
-        - If no active membership is found, returns the `account_id`, "No Membership active", and a fee of "0.0" along with np.nan values for `termEndDate` and `transactionDate`.
-    """
-    account_id = account["accountId"]
-    logging.debug("Getting account type for " + account_id)
-    url = API_BASE_URL + "/accounts/" + str(account_id) + "/memberships"
+    Notes:
+        - The connector is limited to `MAX_CONCURRENCY` simultaneous connections, which is the single limit
+          for the number of requests in flight across all coroutines sharing the session.
+        - New and reused connections are counted in `connection_stats`.
+        - Must be called from within a running event loop.
+    """
+    trace_config = aiohttp.TraceConfig()
+    trace_config.on_request_end.append(_count_connection_event("requests"))
+    trace_config.on_connection_create_end.append(
+        _count_connection_event("new_connections")
+    )
+    trace_config.on_connection_reuseconn.append(
+        _count_connection_event("reused_connections")
+    )
+    connector = aiohttp.TCPConnector(limit=MAX_CONCURRENCY)
+    return aiohttp.ClientSession(
+        connector=connector,
+        timeout=aiohttp.ClientTimeout(total=REQUEST_TIMEOUT),
+        headers=build_api_headers(),
+        auth=aiohttp.BasicAuth(
+            os.getenv("API_ORG_ID") or "", os.getenv("API_API_KEY") or ""
+        ),
+        trace_configs=[trace_config],
+    )
 
-    response = get_request(url, "memberships")
-    today = date.today()
-    memberships = pd.json_normalize(response)
 
-    if len(memberships) == 0:
-        return (account_id, "No Membership active", "0.0", np.nan, np.nan, 0)
+def log_connection_stats() -> dict:
+    """
+    Logs how many requests were sent and how many of them reused a kept-alive connection.
 
-    for i, membership in memberships.iterrows():
-        date_object = datetime.strptime(membership.termEndDate, "%Y-%m-%d").date()
-        if today < date_object:
-            return (
-                account_id,
-                membership["membershipLevel.name"],
-                membership["fee"],
-                membership["termEndDate"],
-                membership["transactionDate"],
-                len(memberships),
-            )
-    return (account_id, "No Membership active", "0.0", np.nan, np.nan, len(memberships))
+    Returns:
+        dict: The request, new connection and reused connection counts of the asyncio session(s).
+    """
+    stats = dict(connection_stats)
+    if stats["requests"]:
+        logging.info(
+            f"{stats['requests']} requests over {stats['new_connections']} connections "
+            f"({stats['reused_connections'] / stats['requests']:.1%} sent on a reused connection)"
+        )
+    return stats
+
+
+def get_response_cache() -> ResponseCache:
+    """
+    Returns the on-disk response cache of `api_request_async`,
+    or None if caching is disabled (`USE_CACHE`).
+    """
+    global _response_cache
+    if not USE_CACHE:
+        return None
+    with _session_lock:
+        if _response_cache is None:
+            _response_cache = ResponseCache(CACHE_PATH, CACHE_MAX_BYTES)
+        return _response_cache
+
+
+def get_attendee_store() -> AttendeeStore:
+    """
+    Returns the persistent attendee store, or None if it is disabled (`USE_ATTENDEE_STORE`).
+    """
+    global _attendee_store
+    if not USE_ATTENDEE_STORE:
+        return None
+    with _session_lock:
+        if _attendee_store is None:
+            _attendee_store = AttendeeStore(ATTENDEE_STORE_PATH)
+        return _attendee_store
+
+
+def get_snapshot() -> AccountSnapshot:
+    """
+    Returns the persistent snapshot of per-account payloads, or None if it is disabled (`USE_SNAPSHOT`).
+    """
+    global _snapshot
+    if not USE_SNAPSHOT:
+        return None
+    with _session_lock:
+        if _snapshot is None:
+            _snapshot = AccountSnapshot(SNAPSHOT_PATH)
+        return _snapshot
 
 
-def get_all_membership_types(accounts: pd.DataFrame) -> dict:
+def open_journal(resume: bool = False) -> ExtractionJournal:
     """
-    Retrieves the membership types and associated fees for all accounts concurrently and returns them in two dictionaries.
+    Starts the checkpoint journal of the current run.
 
     Parameters:
-        accounts (pd.DataFrame): A pandas DataFrame containing account information.
-                                 Each row should represent an account with at least an "accountId" field.
+        resume (bool): Whether to reuse the payloads journaled by an interrupted earlier run.
+                       Otherwise any existing journal is discarded.
+    """
+    global _journal
+    _journal = ExtractionJournal(JOURNAL_PATH, resume, JOURNAL_FSYNC_EVERY)
+    return _journal
 
-    Returns:
-        dict: A tuple containing two dictionaries:
-              - membership_types (dict): A dictionary where keys are account IDs and values are the corresponding membership levels.
-              - fees (dict): A dictionary where keys are account IDs and values are the associated fees for the memberships.
+
+def close_journal(completed: bool) -> None:
+    """
+    Closes the checkpoint journal. It is removed once the run has completed, and kept for `--resume` otherwise.
+    """
+    global _journal
+    if _journal is not None:
+        _journal.close(remove=completed)
+        _journal = None
+
+
+def stored_payload(kind: str, account_id):
+    """
+    Returns a payload ("memberships" or "details") that does not have to be fetched again, or None.
 
     Behavior:
-        - Logs an informational message indicating the start of the process to get all membership types.
-        - Initializes two dictionaries to store membership types and fees.
-        - Uses a `ThreadPoolExecutor` to fetch membership information concurrently for all accounts.
-        - Submits tasks to the executor to call `get_accounts_type` for each account in the DataFrame.
-        - Collects results as they are completed:
-            - Updates the `membership_types` dictionary with the account ID and its membership level.
-            - Updates the `fees` dictionary with the account ID and its membership fee.
-        - Returns a tuple containing the `membership_types` and `fees` dictionaries.
+        - Payloads journaled by an interrupted run are used when resuming (see `open_journal`).
+        - In incremental runs, payloads of accounts that have not been modified since the last run
+          are taken from the snapshot (see `prepare_incremental_run`).
+    """
+    if _journal is not None:
+        payload = _journal.get(kind, account_id)
+        if payload is not None:
+            return payload
+    snapshot = get_snapshot()
+    if snapshot is None:
+        return None
+    return snapshot.get(kind, account_id)
+
+
+def store_payload(kind: str, account_id, payload) -> None:
+    """
+    Records a freshly fetched payload in the checkpoint journal and remembers it for the next incremental run.
+    """
+    if _journal is not None:
+        _journal.record(kind, account_id, payload)
+    snapshot = get_snapshot()
+    if snapshot is not None:
+        snapshot.put(kind, account_id, payload)
+
+
+async def stored_payload_async(kind: str, account_id):
+    """
+    Asyncio counterpart of `stored_payload`. The snapshot is a SQLite database, so it is read in a worker
+    thread instead of blocking the event loop.
+    """
+    return await asyncio.to_thread(stored_payload, kind, account_id)
+
+
+async def store_payload_async(kind: str, account_id, payload) -> None:
+    """
+    Asyncio counterpart of `store_payload`. The journal write (and its periodic fsync) runs in a worker thread
+    instead of blocking the event loop.
+    """
+    await asyncio.to_thread(store_payload, kind, account_id, payload)
+
+
+def flush_snapshot() -> None:
+    """
+    Writes the payloads fetched so far to the snapshot database.
+    """
+    snapshot = get_snapshot()
+    if snapshot is not None:
+        snapshot.flush()
+
+
+def cache_ttl(url: str) -> int:
+    """
+    Returns the number of seconds a response of the given URL may be served from the cache (see `CACHE_TTLS`).
+    URLs that match no pattern are not cached.
+    """
+    path = urlsplit(url).path
+    for pattern, ttl in CACHE_TTLS:
+        if re.search(pattern, path):
+            return ttl
+    return 0
+
+
+def cache_lookup(url: str) -> tuple:
+    """
+    Looks up the cached response of a URL.
+
+    Returns:
+        tuple: The cache key and the cached entry (see `ResponseCache.get`) with an additional "fresh" flag,
+               or (None, None) if the URL is not cacheable, and (key, None) if nothing is cached yet.
 
     Notes:
-        - The `get_accounts_type` function is used to fetch the membership type and fee for each account.
-        - The number of concurrent threads is controlled by the `MAX_WORKERS` variable.
-    """
-    logging.info("Get all membership types")
-    membership_types, fees, term_end_dates, transaction_dates, number_of_memberships = (
-        {},
-        {},
-        {},
-        {},
-        {},
+        - Keys combine the organization, `API_VERSION` and the full URL, so switching the API version
+          or account never serves responses of the other one.
+    """
+    cache = get_response_cache()
+    ttl = cache_ttl(url)
+    if cache is None or ttl <= 0:
+        return None, None
+    key = hashlib.sha256(
+        f"{os.getenv('API_ORG_ID')}|{API_VERSION}|{url}".encode()
+    ).hexdigest()
+    entry = cache.get(key)
+    if entry is not None:
+        entry["fresh"] = time.time() - entry["stored_at"] < ttl
+    return key, entry
+
+
+def conditional_headers(entry: dict) -> dict:
+    """
+    Returns the `If-None-Match`/`If-Modified-Since` headers to revalidate an expired cache entry.
+    """
+    headers = {}
+    if entry is None:
+        return headers
+    if entry["etag"]:
+        headers["If-None-Match"] = entry["etag"]
+    if entry["last_modified"]:
+        headers["If-Modified-Since"] = entry["last_modified"]
+    return headers
+
+
+def cache_store(key: str, url: str, body: bytes, headers) -> None:
+    """
+    Stores a successfully decoded response in the cache, if the URL is cacheable.
+    """
+    if key is None:
+        return
+    get_response_cache().put(
+        key, url, body, headers.get("ETag"), headers.get("Last-Modified")
     )
-    # Get membership types concurrently
-    with concurrent.futures.ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
-        futures = {
-            executor.submit(get_accounts_type, account): account
-            for _, account in accounts.iterrows()
-        }
-        for future in concurrent.futures.as_completed(futures):
-            (
-                id,
-                account_type,
-                fee,
-                term_end_date,
-                transaction_date,
-                number_of_membership,
-            ) = future.result()
-            membership_types[id] = account_type
-            fees[id] = fee
-            term_end_dates[id] = term_end_date
-            transaction_dates[id] = transaction_date
-            number_of_memberships[id] = number_of_membership
 
+
+def page_url(url: str, page: int) -> str:
+    """
+    Returns the URL of the given (0-based) page of a paginated list endpoint.
+    """
+    separator = "&" if "?" in url else "?"
     return (
-        membership_types,
-        fees,
-        term_end_dates,
-        transaction_dates,
-        number_of_memberships,
+        url + separator + "pageSize=" + str(API_PAGE_SIZE) + "&currentPage=" + str(page)
+    )
+
+
+def normalize_page(records: list, page: int) -> pd.DataFrame:
+    """
+    Normalizes the records of one page and indexes them by their position in the full listing,
+    so that batches arriving out of order can be put back in API order with `sort_index`.
+    """
+    batch = pd.json_normalize(records or [])
+    start = page * API_PAGE_SIZE
+    batch.index = pd.RangeIndex(start, start + len(batch))
+    return batch
+
+
+MEMBERSHIPS_SCHEMA = pa.schema(
+    [
+        ("accountId", pa.string()),
+        ("membershipId", pa.string()),
+        ("membershipLevel", pa.string()),
+        ("fee", pa.float64()),
+        ("termStartDate", pa.date32()),
+        ("termEndDate", pa.date32()),
+        ("transactionDate", pa.date32()),
+    ]
+)
+membership_history = []
+
+
+def record_membership_history(account_id, response: list) -> None:
+    """
+    Keeps every membership of an account (not only the active one) for the memberships table.
+
+    Parameters:
+        account_id (str): The ID of the account the memberships belong to.
+        response (list): The raw "memberships" payload of `/accounts/{id}/memberships`.
+    """
+    membership_history.extend(
+        (
+            str(account_id),
+            None if membership.get("id") is None else str(membership["id"]),
+            (membership.get("membershipLevel") or {}).get("name"),
+            membership.get("fee"),
+            membership.get("termStartDate"),
+            membership.get("termEndDate"),
+            membership.get("transactionDate"),
+        )
+        for membership in response or []
     )
 
 
-def get_all_events() -> list:
+def write_memberships_table() -> None:
     """
-    Retrieves all event IDs from the API and returns them as a list.
+    Writes the membership history of the run to `MEMBERSHIPS_TABLE` as a Parquet file.
 
-    Returns:
-        list: A list of event IDs retrieved from the API.
+    Behavior:
+        - One row per membership term, with the columns of `MEMBERSHIPS_SCHEMA`.
+        - Dates are stored as dates (anything after the "YYYY-MM-DD" part is ignored), fees as floats.
+        - Accounts whose memberships could not be fetched have no rows (see `FAILURE_REPORT`).
+    """
+    history = pd.DataFrame(membership_history, columns=MEMBERSHIPS_SCHEMA.names)
+    history["fee"] = pd.to_numeric(history["fee"], errors="coerce")
+    for column in ["termStartDate", "termEndDate", "transactionDate"]:
+        history[column] = pd.to_datetime(
+            history[column].str[:10], format="%Y-%m-%d", errors="coerce"
+        )
+    history = history.sort_values(["accountId", "termStartDate"], kind="stable")
+    table = pa.Table.from_pandas(
+        history, schema=MEMBERSHIPS_SCHEMA, preserve_index=False
+    )
+    pq.write_table(table, MEMBERSHIPS_TABLE)
+    logging.info(f"Wrote {len(history)} memberships to {MEMBERSHIPS_TABLE}")
+
+
+def write_accounts_table(df: pd.DataFrame, path: str) -> None:
+    """
+    Writes the enriched accounts of one type as a Parquet file with the column types of `ACCOUNT_COLUMN_TYPES`.
+
+    Parameters:
+        df (pd.DataFrame): The accounts as written to the CSV file.
+        path (str): The Parquet file to write.
 
     Behavior:
-        - Constructs the API URL to fetch event data with a maximum page size of 5000.
-        - Calls the `get_request` function to send a GET request to the constructed URL and retrieves the response.
-        - Extracts the list of events from the response.
-        - Iterates over the list of events and collects the IDs of all events into a list.
-        - Returns the list of event IDs.
+        - "event_ids" is stored as a list of integers instead of the stringified Python list of the CSV file.
+        - Dates and timestamps are parsed once here; values that cannot be parsed become null.
+        - "userType" and "Membership Type" are dictionary-encoded, the fee is a float.
+        - Other columns whose values Arrow cannot store in a single type (e.g. mixed lists and dictionaries)
+          are stored as strings, as in the CSV file.
+    """
+    typed = df.copy()
+    for column, type in ACCOUNT_COLUMN_TYPES.items():
+        if column not in typed.columns:
+            continue
+        if pa.types.is_list(type):
+            typed[column] = typed[column].map(
+                lambda ids: [int(id) for id in ids] if isinstance(ids, list) else None
+            )
+        elif pa.types.is_timestamp(type):
+            typed[column] = pd.to_datetime(
+                typed[column],
+                format="ISO8601",
+                errors="coerce",
+                utc=type.tz is not None,
+            )
+        elif pa.types.is_dictionary(type):
+            typed[column] = typed[column].astype("category")
+        else:
+            typed[column] = pd.to_numeric(typed[column], errors="coerce")
+    for column in typed.columns.difference(list(ACCOUNT_COLUMN_TYPES)):
+        if typed[column].dtype != object:
+            continue
+        try:
+            pa.array(typed[column], from_pandas=True)
+        except (pa.ArrowInvalid, pa.ArrowTypeError):
+            typed[column] = typed[column].map(
+                lambda value: (
+                    value
+                    if not isinstance(value, (list, dict)) and pd.isna(value)
+                    else str(value)
+                )
+            )
+
+    table = pa.Table.from_pandas(typed, preserve_index=False)
+    schema = pa.schema(
+        [
+            pa.field(field.name, ACCOUNT_COLUMN_TYPES.get(field.name, field.type))
+            for field in table.schema
+        ],
+        metadata=table.schema.metadata,
+    )
+    pq.write_table(table.cast(schema), path)
+    logging.info(f"Wrote {len(typed)} accounts to {path}")
+
+
+class MembershipRecord:
+    """
+    Compact result of the membership classification of one account.
+
+    Attributes:
+        account_id (str): The ID of the account.
+        membership_type (str): The name of the active membership level, "No Membership active",
+                               or `UNKNOWN_MEMBERSHIP` if the memberships could not be fetched.
+        fee (float or str): The fee of the active membership, or "0.0".
+        term_end_date (str): The end date of the active membership, or np.nan.
+        transaction_date (str): The transaction date of the active membership, or np.nan.
+        total_memberships (int): The total number of memberships of the account.
 
     Notes:
-        - Assumes that the API response contains an "events" field, which is a list of event objects.
-        - Each event object in the list is expected to have an "id" field.
+        - Uses `__slots__`, so the many records built during an extraction carry no per-instance dictionary.
+        - Iterating a record yields its fields in the order above, so it unpacks like a tuple.
     """
-    url = API_BASE_URL + "/events?pageSize=5000"
 
-    response = get_request(url, "events")
-    return response
+    __slots__ = (
+        "account_id",
+        "membership_type",
+        "fee",
+        "term_end_date",
+        "transaction_date",
+        "total_memberships",
+    )
+
+    def __init__(
+        self,
+        account_id,
+        membership_type,
+        fee,
+        term_end_date,
+        transaction_date,
+        total_memberships,
+    ):
+        self.account_id = account_id
+        self.membership_type = membership_type
+        self.fee = fee
+        self.term_end_date = term_end_date
+        self.transaction_date = transaction_date
+        self.total_memberships = total_memberships
+
+    def __iter__(self):
+        return (getattr(self, field) for field in self.__slots__)
+
+    def __repr__(self):
+        fields = ", ".join(
+            f"{field}={getattr(self, field)!r}" for field in self.__slots__
+        )
+        return f"MembershipRecord({fields})"
+
+
+def failed_membership(account_id) -> MembershipRecord:
+    """
+    Returns the membership record of an account whose memberships could not be fetched.
+    Its membership type is `UNKNOWN_MEMBERSHIP`, so that the report does not count it as a member;
+    all other fields except the account ID are unknown (np.nan).
+    """
+    return MembershipRecord(
+        account_id, UNKNOWN_MEMBERSHIP, np.nan, np.nan, np.nan, np.nan
+    )
 
 
-def get_attendees(eventId: int) -> list:
+def parse_memberships(
+    account_id, response: list, today: str = None
+) -> MembershipRecord:
     """
-    Retrieves the list of unique attendee IDs for a given event from the API.
+    Determines the active membership of an account from the raw "memberships" payload of the API.
 
     Parameters:
-        eventId (int): The unique identifier of the event for which attendees are being fetched.
+        account_id (str): The ID of the account the memberships belong to.
+        response (list): The list of membership objects returned by `/accounts/{id}/memberships`.
+        today (str): The reference date in "YYYY-MM-DD" format. Defaults to the current date.
 
     Returns:
-        list: A list of unique attendee IDs associated with the specified event.
-              Returns an empty list if no attendees are found.
+        MembershipRecord: The classification of the account (account_id, membership_level, fee,
+                          termEndDate, transactionDate, totalMemberships).
 
     Behavior:
-        - Constructs the API URL to fetch attendee data for the specified event.
-        - Calls the `get_request` function to send a GET request to the constructed URL and retrieves the response.
-        - Extracts the list of attendees from the response.
-        - If no attendees are found (i.e., the "attendees" field is `None`), returns an empty list.
-        - Otherwise, iterates over the list of attendees, collects the `registrantAccountId` for each attendee, and ensures that only unique IDs are included in the final list.
-        - Returns the list of unique attendee IDs.
+        - Walks the raw membership dictionaries and returns the first one whose `termEndDate` lies after `today`.
+        - Dates are compared as ISO strings ("YYYY-MM-DD" sorts chronologically), so no date objects
+          and no DataFrame are built per account.
+        - Memberships without a `termEndDate` are never active.
 
     Notes:
-        - Assumes that the API response contains an "attendees" field, which is a list of attendee objects.
-        - Each attendee object in the list is expected to have a "registrantAccountId" field.
+        - Used by `get_accounts_type_async` for fetched and stored payloads alike.
     """
-    url = API_BASE_URL + "/events/" + str(eventId) + "/attendees"
+    if today is None:
+        today = date.today().isoformat()
+    memberships = response or []
+
+    for membership in memberships:
+        term_end_date = membership.get("termEndDate")
+        if term_end_date and term_end_date[:10] > today:
+            return MembershipRecord(
+                account_id,
+                (membership.get("membershipLevel") or {}).get("name", np.nan),
+                membership.get("fee", np.nan),
+                term_end_date,
+                membership.get("transactionDate", np.nan),
+                len(memberships),
+            )
+    return MembershipRecord(
+        account_id, "No Membership active", "0.0", np.nan, np.nan, len(memberships)
+    )
+
 
-    response = get_request(url, "attendees")
+def parse_attendees(response: list) -> list:
+    """
+    Extracts the unique registrant account IDs from the raw "attendees" payload of the API.
+
+    Parameters:
+        response (list): The list of attendee objects returned by `/events/{id}/attendees`, or None.
+
+    Returns:
+        list: A list of unique attendee IDs. Returns an empty list if there are no attendees.
+    """
     if response is None:
         return []
     # Return only unique ids
     return list(set([attendee["registrantAccountId"] for attendee in response]))
 
 
-def add_events_to_account(df) -> pd.DataFrame:
+def load_final_attendees(events_df: pd.DataFrame) -> dict:
     """
-    Adds a list of event IDs to each account in a DataFrame, representing the events each account has attended.
+    Returns the stored attendee lists of the events in `events_df` that are marked final,
+    so that they do not have to be requested again.
 
     Parameters:
-        df (pd.DataFrame): A pandas DataFrame containing account information.
-                           Each row should represent an account with at least an "accountId" field.
+        events_df (pd.DataFrame): The events returned by `filter_events`.
 
     Returns:
-        pd.DataFrame: The input DataFrame with an additional column "event_ids" added.
-                      This column contains lists of event IDs that each account has attended.
+        dict: A dictionary mapping event IDs to attendee lists. Empty if the attendee store is disabled
+              or `REFRESH_ATTENDEES` is set.
+    """
+    store = get_attendee_store()
+    if store is None or REFRESH_ATTENDEES:
+        return {}
+    final = store.get_final(events_df["id"].tolist())
+    logging.info(
+        f"{len(final)} of {len(events_df)} events are final, fetching attendees of {len(events_df) - len(final)}"
+    )
+    return final
+
+
+def save_attendees(events_df: pd.DataFrame, fetched: dict) -> None:
+    """
+    Stores freshly fetched attendee lists in the attendee store.
+
+    Parameters:
+        events_df (pd.DataFrame): The events returned by `filter_events`.
+        fetched (dict): A dictionary mapping event IDs to the attendee lists fetched in this run
+                        (None for lists that could not be fetched, which are not stored).
 
     Behavior:
-        - Retrieves all event IDs using the `get_all_event_ids` function.
-        - Initializes an empty list in a new "event_ids" column for each account in the DataFrame.
-        - Iterates over each event ID:
-            - Retrieves the list of attendee IDs for the current event using the `get_attendees` function.
-            - For each attendee, finds the corresponding account in the DataFrame and appends the current event ID to its "event_ids" list.
-        - Returns the updated DataFrame with the "event_ids" column populated with lists of event IDs.
+        - Events whose "startDate" lies more than `ATTENDEES_FINAL_AFTER_DAYS` in the past are marked final
+          and will be served from the store in all later runs.
+    """
+    store = get_attendee_store()
+    if store is None:
+        return
+    horizon = (date.today() - timedelta(days=ATTENDEES_FINAL_AFTER_DAYS)).isoformat()
+    start_dates = dict(zip(events_df["id"], events_df["startDate"]))
+    store.put_many(
+        [
+            (
+                event_id,
+                start_dates[event_id],
+                attendees,
+                isinstance(start_dates[event_id], str)
+                and start_dates[event_id] < horizon,
+            )
+            for event_id, attendees in fetched.items()
+            if attendees is not None
+        ]
+    )
 
-    Notes:
-        - Assumes that the DataFrame `df` contains a column named "accountId" which uniquely identifies each account.
-        - The "event_ids" column is added to the DataFrame, where each cell contains a list of event IDs representing the events attended by the account.
-        - The `get_all_event_ids` and `get_attendees` functions are used to fetch event and attendee data from the API.
+
+def filter_events(events: pd.DataFrame) -> pd.DataFrame:
+    """
+    Keeps only the events of the API event listing that are relevant for the report.
+
+    Parameters:
+        events (pd.DataFrame): The normalized event listing of the API (see `iter_pages_async`).
+
+    Returns:
+        pd.DataFrame: A DataFrame with the columns "id", "name" and "startDate" of all
+                      non-archived events (the placeholder event with ID 2 is discarded).
     """
-    events = get_all_events()
-    events_df = pd.json_normalize(events)
-    events_df = events_df[events_df["archived"] == False]
+    events_df = events[events["archived"] == False]
     events_df = events_df[events_df["id"] != 2]
-    events_df = events_df[
+    return events_df[
         [
             "id",
             "name",
             "startDate",
         ]
     ]
-    events_df.to_csv("events.csv", index=False, header=True)
-
-    event_ids = events_df["id"].tolist()
-    df.loc[:, "event_ids"] = [[] for _ in range(len(df))]
-
-    for event_id in event_ids:
-        logging.debug("Getting attendees for event " + str(event_id))
-        attendees = get_attendees(event_id)
-        for attendee in attendees:
-            df.loc[df["accountId"] == attendee, "event_ids"] = df.loc[
-                df["accountId"] == attendee, "event_ids"
-            ].apply(lambda x: x + [event_id])
-
-    return df
 
 
-def add_creation_date_to_account(df, actual_type):
+def build_account_events_index(event_attendees: dict) -> dict:
     """
-    Adds creation date and other additional information to accounts in a DataFrame by retrieving details from an API.
+    Inverts the attendee lists of all events into a lookup of the events attended by each account.
 
     Parameters:
-       df (pd.DataFrame): A pandas DataFrame containing account information.
-                          Each row should represent an account with at least an "accountId" and "userType" field.
-       actual_type (str): The actual type of the accounts to be fetched (e.g., "INDIVIDUAL" or "COMPANY").
+        event_attendees (dict): A dictionary mapping each event ID to the list of its attendee account IDs.
 
     Returns:
-       pd.DataFrame: The input DataFrame merged with additional account information, including creation dates.
-                     Columns that only contain NaN or None values are discarded.
-
-    Behavior:
-       - Uses a `ThreadPoolExecutor` to fetch additional account information concurrently for each account in the DataFrame.
-       - For each account, submits a task to the executor to call the `get_accounts_additional_information` function, passing in the account's ID, user type, and the specified actual type.
-       - Collects the results as they are completed and concatenates them into a single DataFrame.
-       - Drops any columns in the concatenated DataFrame that contain only NaN or None values.
-       - Merges the original DataFrame with the concatenated DataFrame on the "accountId" column, using an outer join to include all accounts and their additional information.
-       - Returns the merged DataFrame.
+        dict: A dictionary mapping each attendee account ID to the list of event IDs it attended,
+              in the order of `event_attendees`.
 
     Notes:
-       - The `get_accounts_additional_information` function is used to fetch the additional details for each account.
-       - The number of concurrent threads is controlled by the `MAX_WORKERS` variable.
-       - The merged DataFrame contains additional columns based on the data retrieved from the API, which may include creation dates and other relevant information.
+        - Runs in a single pass over all attendees, independently of the number of accounts.
+    """
+    account_events = {}
+    for event_id, attendees in event_attendees.items():
+        # None marks an attendee list that could not be fetched
+        for attendee in attendees or []:
+            account_events.setdefault(attendee, []).append(event_id)
+    return account_events
 
-    Example:
-       df = add_creation_date_to_account(df, actual_type="COMPANY")
-    """
-    with concurrent.futures.ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
-        futures = {
-            executor.submit(
-                get_accounts_additional_information,
-                account["accountId"],
-                account["userType"],
-                actual_type,
-            ): account
-            for _, account in df.iterrows()
-        }
-        results = [
-            future.result() for future in concurrent.futures.as_completed(futures)
-        ]
 
-    all_information = pd.concat(results, ignore_index=True)
+def map_events_to_accounts(df: pd.DataFrame, account_events: dict) -> pd.DataFrame:
+    """
+    Adds the "event_ids" column to an account DataFrame from an account -> events index.
 
-    # Merge all information with the original dataframe by accountId
-    df = pd.merge(
-        df,
-        all_information,
-        on=["accountId"],
-        how="outer",
-        validate="one_to_one",
+    Parameters:
+        df (pd.DataFrame): A pandas DataFrame containing at least an "accountId" column.
+        account_events (dict): The index built by `build_account_events_index`.
+
+    Returns:
+        pd.DataFrame: The input DataFrame with the "event_ids" column populated.
+
+    Behavior:
+        - Attaches the index to the DataFrame with a single `map` over "accountId"; accounts without
+          any attended event get an empty list.
+    """
+    event_ids = df["accountId"].map(account_events)
+    df["event_ids"] = pd.Series(
+        [ids if isinstance(ids, list) else [] for ids in event_ids],
+        index=df.index,
+        dtype=object,
     )
 
     return df
 
 
-def add_membership_type_to_account(df) -> pd.DataFrame:
+def merge_additional_information(df: pd.DataFrame, results: list) -> pd.DataFrame:
     """
-    Adds membership type and fee information to each account in a DataFrame.
+    Merges the per-account results of `get_account_details_async` into the account DataFrame.
 
     Parameters:
-        df (pd.DataFrame): A pandas DataFrame containing account information.
-                           Each row should represent an account with at least an "accountId" field.
+        df (pd.DataFrame): A pandas DataFrame containing at least an "accountId" column.
+        results (list): The dictionaries returned for every account in `df`.
 
     Returns:
-        pd.DataFrame: The input DataFrame with two additional columns:
-                      - "Membership Type": The type of membership associated with each account.
-                      - "Fee": The fee associated with the membership type.
+        pd.DataFrame: The input DataFrame merged (outer join on "accountId") with the additional information.
 
     Behavior:
-        - Calls the `get_all_membership_types` function to retrieve membership types and fees for all accounts in the DataFrame.
-        - Maps the retrieved membership types to the "accountId" column in the DataFrame, creating a new "Membership Type" column.
-        - Maps the retrieved fees to the "accountId" column in the DataFrame, creating a new "Fee" column.
-        - Returns the updated DataFrame with the added membership information.
-
-    Notes:
-        - Assumes that the DataFrame `df` contains a column named "accountId" which uniquely identifies each account.
-        - The `get_all_membership_types` function is used to fetch the membership type and fee for each account.
-
-    Example:
-        df = add_membership_type_to_account(df)
+        - Flattens the nested dictionaries with `pd.json_normalize` in batches of `NORMALIZE_BATCH_SIZE` accounts,
+          which bounds the size of the intermediate records, and concatenates the few resulting DataFrames.
     """
-    membership_types, fees, term_end_dates, transactiom_dates, number_of_memberships = (
-        get_all_membership_types(df)
+    all_information = pd.concat(
+        [
+            pd.json_normalize(results[start : start + NORMALIZE_BATCH_SIZE])
+            for start in range(0, len(results), NORMALIZE_BATCH_SIZE)
+        ]
+        or [pd.DataFrame({"accountId": []})],
+        ignore_index=True,
     )
-    df["Membership Type"] = df["accountId"].map(membership_types)
-    df["Fee"] = df["accountId"].map(fees)
-    df["Term End Date"] = df["accountId"].map(term_end_dates)
-    df["Transaction Date"] = df["accountId"].map(transactiom_dates)
-    df["Number of Memberships"] = df["accountId"].map(number_of_memberships)
+
+    # Merge all information with the original dataframe by accountId
+    df = pd.merge(
+        df,
+        all_information,
+        on=["accountId"],
+        how="outer",
+        validate="one_to_one",
+    )
+
     return df
 
 
@@ -652,38 +1453,739 @@ def add_export_date(df) -> pd.DataFrame:
     return df
 
 
-def add_fields_to_account(account: pd.DataFrame, actual) -> pd.DataFrame:
+async def get_request_async(
+    session: aiohttp.ClientSession, url: str, return_key: str
+) -> dict:
     """
-    Enhances an account DataFrame by adding various fields and filtering based on account type, then returns the modified DataFrame.
+    Sends a GET request to the specified URL with the required headers and authentication,
+    and returns the JSON response.
 
     Parameters:
-        account (pd.DataFrame): A pandas DataFrame containing account information.
-        actual (str): The actual type of the accounts, either "INDIVIDUAL" or "COMPANY".
+        session (aiohttp.ClientSession): The session created by `create_async_session`.
+        url (str): The URL to which the GET request will be sent.
+        return_key (str): The key of the JSON response to return, or None to return the whole response.
 
     Returns:
-        pd.DataFrame: The input DataFrame with additional fields and filtering applied based on the account type.
+        dict: The value stored under `return_key` in the JSON response from the server.
 
     Behavior:
-        - Adds membership type and fee information to the account DataFrame using `add_membership_type_to_account`.
-        - Filters out accounts with no active membership using `filter_non_active_accounts`.
-        - Adds event participation details to the account DataFrame using `add_events_to_account`.
-        - Adds creation date and additional information to the account DataFrame using `add_creation_date_to_account`.
-        - Filters the DataFrame based on the account type (`actual`):
-            - If `actual` is "INDIVIDUAL", irrelevant columns are removed using `filter_individuals`.
-            - If `actual` is "COMPANY", irrelevant columns are removed using `filter_companies`.
-        - Adds an "Export Date" column with the current date and time using `add_export_date`.
-        - Returns the fully processed and filtered DataFrame.
+        - Sends the headers of `build_api_headers` and the credentials of the `.env` file (see `create_async_session`).
+        - Waits for a token of the shared `rate_limiter` before every attempt, so that all requests together
+          stay within `API_RATE_LIMIT` requests per second (with bursts of up to `API_BURST`).
+        - If the server answers 429 or 503 with a `Retry-After` header, the whole rate limiter is paused
+          for that duration before retrying.
+        - Responses of cacheable endpoints are served from the on-disk cache while they are fresh (`CACHE_TTLS`).
+          Expired entries are revalidated with `If-None-Match`/`If-Modified-Since`; a `304 Not Modified` reuses the cached body.
+        - Failed attempts (retryable statuses, connection errors, empty or malformed responses) are retried
+          with exponential backoff and jitter, as decided by `next_retry_delay` and `retry_policy`.
+          All waits use `asyncio.sleep`, so that other requests keep running in the meantime.
+
+    Raises:
+        RequestFailedError: If the request is given up after `MAX_ATTEMPTS` or on a non-retryable status.
+        FatalRequestError: If the status is fatal (e.g. invalid credentials) or the `ERROR_BUDGET` is used up.
+    """
+    return await api_request_async(session, "GET", url, return_key)
+
+
+async def post_request_async(
+    session: aiohttp.ClientSession, url: str, payload: dict, return_key: str
+) -> dict:
+    """
+    Sends a POST request with a JSON body (e.g. to a search endpoint) and returns the value stored under `return_key`.
 
     Notes:
-        - The `actual` parameter must be either "INDIVIDUAL" or "COMPANY". If an invalid type is provided, a `ValueError` is raised.
-        - This function combines multiple processing steps to enrich and clean the account data, making it ready for export or analysis.
+        - Shares the `rate_limiter` and retry rules of `get_request_async`. POST responses are never cached.
+    """
+    return await api_request_async(session, "POST", url, return_key, payload)
 
-    Example:
-        processed_accounts = add_fields_to_account(accounts_df, actual="COMPANY")
+
+async def api_request_async(
+    session: aiohttp.ClientSession,
+    method: str,
+    url: str,
+    return_key: str,
+    payload: dict = None,
+) -> dict:
+    """
+    Sends a request to the API with caching (GET only), rate limiting and retries; see `get_request_async`.
+    """
+    # The cache is a SQLite database: its reads and writes run in worker threads so they do not block the event loop
+    cacheable = method == "GET" and USE_CACHE and cache_ttl(url) > 0
+    key, cached = (
+        await asyncio.to_thread(cache_lookup, url) if cacheable else (None, None)
+    )
+    if cached is not None and cached["fresh"]:
+        run_metrics.count_cache_hit(method, url)
+        return decode_response(cached["body"], return_key)
+
+    attempt = 0
+    while True:
+        retry_policy.check_budget()
+        attempt += 1
+        wait = rate_limiter.reserve()
+        if wait > 0:
+            run_metrics.add_wait("rate_limit", wait)
+            await asyncio.sleep(wait)
+        started = time.perf_counter()
+        try:
+            async with session.request(
+                method, url, headers=conditional_headers(cached), json=payload
+            ) as api_response:
+                content = await api_response.read()
+                run_metrics.observe_request(
+                    method,
+                    url,
+                    api_response.status,
+                    time.perf_counter() - started,
+                    len(content),
+                )
+                if api_response.status == 304 and cached is not None:
+                    await asyncio.to_thread(get_response_cache().touch, key)
+                    return decode_response(cached["body"], return_key)
+                api_response.raise_for_status()
+            res = decode_response(content, return_key)
+            if key is not None:
+                await asyncio.to_thread(
+                    cache_store, key, url, content, api_response.headers
+                )
+            return res
+
+        except aiohttp.ClientResponseError as err:
+            delay = next_retry_delay(
+                url,
+                attempt,
+                f"HTTP error occurred: {err}",
+                err.status,
+                err.headers,
+                method,
+            )
+        except (aiohttp.ClientError, asyncio.TimeoutError) as err:
+            run_metrics.observe_request(
+                method, url, "error", time.perf_counter() - started, 0
+            )
+            delay = next_retry_delay(
+                url, attempt, f"Connection error occurred: {err!r}", method=method
+            )
+        except ValueError as err:
+            delay = next_retry_delay(url, attempt, str(err), method=method)
+        run_metrics.add_wait("backoff", delay)
+        await asyncio.sleep(delay)
+
+
+async def iter_pages_async(session: aiohttp.ClientSession, url: str, return_key: str):
+    """
+    Streams all records of a paginated list endpoint as normalized DataFrame batches.
+
+    Parameters:
+        session (aiohttp.ClientSession): The session created by `create_async_session`.
+        url (str): The URL of the list endpoint, optionally with a query string (e.g. "/accounts?userType=COMPANY").
+        return_key (str): The key of the records in the JSON response (e.g. "accounts").
+
+    Yields:
+        pd.DataFrame: One normalized batch per page, as soon as the page arrives, indexed by the position
+                      of its records in the listing (see `normalize_page`). Batches may come out of order.
+
+    Notes:
+        - Reads the total number of pages from the "pagination" metadata of the first page.
+        - All pages after the first are requested at once; the session and `rate_limiter` bound how many are in flight.
+        - Unlike a single large `pageSize` request, listings are never truncated.
+    """
+    first = await get_request_async(session, page_url(url, 0), None)
+    total_pages = first.get("pagination", {}).get("totalPages", 1)
+    logging.debug(f"{url}: {total_pages} pages")
+    yield normalize_page(first.get(return_key), 0)
+
+    async def fetch_page(page):
+        records = await get_request_async(session, page_url(url, page), return_key)
+        return normalize_page(records, page)
+
+    for task in asyncio.as_completed(
+        [fetch_page(page) for page in range(1, total_pages)]
+    ):
+        yield await task
+
+
+async def iter_search_pages_async(
+    session: aiohttp.ClientSession, search_fields: list, output_fields: list
+):
+    """
+    Streams the results of an account search (POST `/accounts/search`) page by page.
+
+    Parameters:
+        session (aiohttp.ClientSession): The session created by `create_async_session`.
+        search_fields (list): The search criteria, e.g. [{"field": "Account Type", "operator": "EQUAL", "value": "Individual"}].
+        output_fields (list): The names of the fields to return for every matching account.
+
+    Yields:
+        list: The "searchResults" of one page, as a list of dictionaries keyed by output field name.
+
+    Behavior:
+        - Fetches the first page to learn the number of pages, then requests all remaining pages
+          concurrently and yields them as they arrive.
+    """
+    url = API_BASE_URL + "/accounts/search"
+
+    def search_payload(page):
+        return {
+            "searchFields": search_fields,
+            "outputFields": output_fields,
+            "pagination": {"currentPage": page, "pageSize": SEARCH_PAGE_SIZE},
+        }
+
+    first = await post_request_async(session, url, search_payload(0), None)
+    total_pages = first.get("pagination", {}).get("totalPages", 1)
+    yield first.get("searchResults") or []
+
+    for task in asyncio.as_completed(
+        [
+            post_request_async(session, url, search_payload(page), "searchResults")
+            for page in range(1, total_pages)
+        ]
+    ):
+        yield await task or []
+
+
+async def get_modified_account_ids_async(
+    session: aiohttp.ClientSession, since: str
+) -> set:
+    """
+    Returns the IDs of all accounts modified on or after the given date.
+
+    Parameters:
+        session (aiohttp.ClientSession): The session created by `create_async_session`.
+        since (str): The date in "YYYY-MM-DD" format.
+
+    Returns:
+        set: The account IDs as strings.
+    """
+    search_fields = [
+        {
+            "field": SEARCH_FIELD_LAST_MODIFIED,
+            "operator": "GREATER_AND_EQUAL",
+            "value": since,
+        }
+    ]
+    account_ids = set()
+    async for results in iter_search_pages_async(
+        session, search_fields, ["Account ID"]
+    ):
+        account_ids.update(str(result["Account ID"]) for result in results)
+    return account_ids
+
+
+async def get_searchable_output_fields_async(session: aiohttp.ClientSession) -> set:
+    """
+    Returns the names of the output fields the account search can return for the organization,
+    or None if they could not be fetched.
+    """
+    try:
+        response = await get_request_async(
+            session, API_BASE_URL + "/accounts/search/outputFields", None
+        )
+    except RequestFailedError as err:
+        logging.warning(f"Could not fetch the search output fields: {err.reason}")
+        return None
+    return {
+        field.get("fieldName")
+        for key in ("standardFields", "customFields")
+        for field in response.get(key) or []
+    }
+
+
+def nest_search_result(result: dict) -> dict:
+    """
+    Turns one search result into the nested shape of the account details, using the columns of `DETAIL_SEARCH_FIELDS`
+    (e.g. {"Origin Detail": "web"} becomes {"origin": {"originDetail": "web"}}), so that
+    `merge_additional_information` flattens both into the same columns.
+    """
+    details = {}
+    for name, column in DETAIL_SEARCH_FIELDS.items():
+        if result.get(name) in (None, ""):
+            continue
+        *parents, leaf = column.split(".")
+        node = details
+        for parent in parents:
+            node = node.setdefault(parent, {})
+        node[leaf] = result[name]
+    return details
+
+
+async def search_account_details_async(
+    session: aiohttp.ClientSession, actual_type: str
+) -> dict:
+    """
+    Fetches the details of all accounts of one type with paginated account searches instead of one
+    `/accounts/{id}` request per account.
+
+    Parameters:
+        session (aiohttp.ClientSession): The session created by `create_async_session`.
+        actual_type (str): The type of the accounts ("INDIVIDUAL" or "COMPANY").
+
+    Returns:
+        dict: The details of every found account (see `nest_search_result`), keyed by account ID as a string,
+              or None if the search cannot return all fields of `DETAIL_SEARCH_FIELDS`.
+
+    Notes:
+        - Only the columns of `DETAIL_SEARCH_FIELDS` are filled. If one of them is not available as an output
+          field, the details of all accounts are fetched one by one as in a regular run.
+        - The first `DETAIL_PROBE_ACCOUNTS` found accounts are also fetched one by one. If their details have
+          columns (after `filter_individuals`/`filter_companies`) that `DETAIL_SEARCH_FIELDS` does not fill,
+          the details of all accounts are fetched one by one as well, so that the CSV files have the same
+          columns as in a regular run. Columns that none of the probed accounts has are not detected.
+        - Accounts missing from the search results, e.g. because a page could not be fetched, are fetched
+          one by one (see `get_account_details_async`).
+    """
+    with run_metrics.stage("search " + actual_type):
+        available = await get_searchable_output_fields_async(session)
+        if available is not None:
+            missing = [name for name in DETAIL_SEARCH_FIELDS if name not in available]
+            if missing:
+                logging.warning(
+                    f"Account search cannot return {missing}, fetching the details of every account"
+                )
+                return None
+
+        search_fields = [
+            {
+                "field": SEARCH_FIELD_ACCOUNT_TYPE,
+                "operator": "EQUAL",
+                "value": SEARCH_ACCOUNT_TYPES[actual_type],
+            }
+        ]
+        details = {}
+        try:
+            async for results in iter_search_pages_async(
+                session, search_fields, list(DETAIL_SEARCH_FIELDS)
+            ):
+                for result in results:
+                    details[str(result["Account ID"])] = nest_search_result(result)
+        except RequestFailedError as err:
+            # the accounts of the missing pages are fetched one by one
+            record_dead_letter("search", actual_type, err)
+        logging.info(
+            f"Found the details of {len(details)} accounts of type {actual_type}"
+        )
+
+        # the search must fill every column the account details would; probe a few accounts to check it
+        probes = list(details)[:DETAIL_PROBE_ACCOUNTS]
+        payloads = await asyncio.gather(
+            *(
+                get_accounts_additional_information_async(
+                    session, account_id, actual_type, actual_type
+                )
+                for account_id in probes
+            )
+        )
+        filter_accounts = (
+            filter_individuals if actual_type == "INDIVIDUAL" else filter_companies
+        )
+        columns = (
+            filter_accounts(pd.json_normalize(payloads)).columns if payloads else []
+        )
+        uncovered = sorted(
+            set(columns) - set(DETAIL_SEARCH_FIELDS.values()) - {"accountId"}
+        )
+        if uncovered:
+            logging.warning(
+                f"Account search cannot fill {uncovered}, fetching the details of every account"
+            )
+            return None
+        details.update(zip(probes, payloads))
+        return details
+
+
+async def prepare_incremental_run(session: aiohttp.ClientSession) -> None:
+    """
+    Declares the accounts modified since the last run in the snapshot, so that the detail and
+    membership payloads of all other accounts are taken from disk instead of the API.
+
+    Parameters:
+        session (aiohttp.ClientSession): The session created by `create_async_session`.
+
+    Behavior:
+        - Reads the high-water mark (the latest `timestamps.lastModifiedDateTime` seen by the previous run).
+        - Searches for accounts modified since then. The search works on whole days, so one extra day
+          is included to be safe with time zones.
+        - Accounts that are new (not in the snapshot yet) are fetched anyway, since the snapshot has no payload for them.
+        - Without a previous snapshot, or if the search fails, nothing is reused and the run fetches everything.
+
+    Notes:
+        - Membership status is always recomputed from the stored membership payloads, so memberships that
+          expire between two runs are classified correctly. Memberships added without modifying the account
+          are only picked up by a full run.
     """
-    account = add_membership_type_to_account(account)
-    account = add_events_to_account(account)
-    account = add_creation_date_to_account(account, actual)
+    snapshot = get_snapshot()
+    high_water_mark = None if snapshot is None else snapshot.get_meta("high_water_mark")
+    if high_water_mark is None:
+        logging.info("No previous snapshot, running a full extraction")
+        return
+
+    since = (pd.Timestamp(high_water_mark) - pd.Timedelta(days=1)).date().isoformat()
+    try:
+        modified = await get_modified_account_ids_async(session, since)
+    except RequestFailedError as err:
+        logging.warning(
+            f"Could not search for modified accounts ({err.reason}), running a full extraction"
+        )
+        return
+    snapshot.mark_modified(modified)
+    logging.info(
+        f"Incremental run: {len(modified)} accounts modified since {since}, "
+        f"reusing the snapshot for all other accounts"
+    )
+
+
+def update_high_water_mark(accounts: list) -> None:
+    """
+    Stores the latest `timestamps.lastModifiedDateTime` of the extracted accounts as the high-water mark
+    for the next incremental run.
+
+    Parameters:
+        accounts (list): The enriched account DataFrames of this run.
+    """
+    snapshot = get_snapshot()
+    column = "timestamps.lastModifiedDateTime"
+    stamps = [df[column] for df in accounts if column in df.columns]
+    if snapshot is None or not stamps:
+        return
+    latest = pd.to_datetime(pd.concat(stamps), utc=True, errors="coerce").max()
+    if pd.isna(latest):
+        return
+    snapshot.set_meta("high_water_mark", latest.isoformat())
+
+
+async def get_accounts_type_async(
+    session: aiohttp.ClientSession, account_id
+) -> MembershipRecord:
+    """
+    Determines the membership type and associated fee of an account, based on its active memberships.
+
+    Parameters:
+        session (aiohttp.ClientSession): The session created by `create_async_session`.
+        account_id (str): The ID of the account.
+
+    Returns:
+        MembershipRecord: The classification of `parse_memberships`. If the memberships cannot be fetched,
+                          the account is recorded as a dead letter and `failed_membership` is returned.
+
+    Notes:
+        - The raw memberships are also added to the membership history (`record_membership_history`).
+    """
+    logging.debug("Getting account type for " + str(account_id))
+    url = API_BASE_URL + "/accounts/" + str(account_id) + "/memberships"
+
+    response = await stored_payload_async("memberships", account_id)
+    if response is None:
+        try:
+            response = await get_request_async(session, url, "memberships")
+        except RequestFailedError as err:
+            record_dead_letter("memberships", account_id, err)
+            return failed_membership(account_id)
+        await store_payload_async("memberships", account_id, response)
+    record_membership_history(account_id, response)
+    return parse_memberships(account_id, response)
+
+
+async def get_attendees_async(session: aiohttp.ClientSession, eventId: int) -> list:
+    """
+    Retrieves the list of unique attendee IDs for a given event from the API.
+
+    Returns:
+        list: The unique `registrantAccountId`s of the attendees (see `parse_attendees`), an empty list if
+              the event has no attendees, and None if the attendees could not be fetched.
+    """
+    logging.debug("Getting attendees for event " + str(eventId))
+    url = API_BASE_URL + "/events/" + str(eventId) + "/attendees"
+
+    try:
+        response = await get_request_async(session, url, "attendees")
+    except RequestFailedError as err:
+        record_dead_letter("attendees", eventId, err)
+        return None
+    return parse_attendees(response)
+
+
+async def get_account_events_index_async(session: aiohttp.ClientSession) -> dict:
+    """
+    Runs the event/attendee stage once and returns the events attended by each account.
+
+    Returns:
+        dict: A dictionary mapping each attendee account ID to the list of event IDs it attended.
+
+    Behavior:
+        - Fetches the event list page by page (`iter_pages_async`), keeps the relevant events with
+          `filter_events` and writes them to "events.csv".
+        - Takes the attendee lists of final (long past) events from the attendee store and downloads
+          the attendee lists of all other events concurrently.
+        - Inverts them with `build_account_events_index`, keeping the order of the event list.
+
+    Notes:
+        - The result covers individuals and companies alike, so one call serves both account types.
+    """
+    url = API_BASE_URL + "/events"
+    batches = [batch async for batch in iter_pages_async(session, url, "events")]
+    events_df = filter_events(pd.concat(batches).sort_index())
+    events_df.to_csv("events.csv", index=False, header=True)
+
+    event_attendees = load_final_attendees(events_df)
+    to_fetch = [
+        event_id
+        for event_id in events_df["id"].tolist()
+        if event_id not in event_attendees
+    ]
+    attendees = await asyncio.gather(
+        *[get_attendees_async(session, event_id) for event_id in to_fetch]
+    )
+    fetched = dict(zip(to_fetch, attendees))
+    save_attendees(events_df, fetched)
+    event_attendees.update(fetched)
+
+    return build_account_events_index(
+        {event_id: event_attendees[event_id] for event_id in events_df["id"]}
+    )
+
+
+async def get_accounts_additional_information_async(
+    session: aiohttp.ClientSession, account_id, account_type, actual_type
+) -> dict:
+    """
+    Fetches the details of an account and returns them as the raw (nested) dictionary of the API.
+
+    Parameters:
+        account_id (str or int): The unique identifier for the account.
+        account_type (str): The type of the account as listed by the API ("COMPANY" or "INDIVIDUAL").
+        actual_type (str): The type of the accounts being extracted ("COMPANY" or "INDIVIDUAL").
+
+    Returns:
+        dict: The "individualAccount" or "companyAccount" payload. If `account_type` does not match
+              `actual_type` or the request failed, a dictionary with only the `accountId` is returned.
+
+    Raises:
+        ValueError: If `actual_type` is neither "COMPANY" nor "INDIVIDUAL".
+
+    Notes:
+        - The result is deliberately not normalized here: building a one-row DataFrame per account costs far more
+          than the payload itself. `merge_additional_information` normalizes all accounts at once.
+    """
+    logging.debug("Getting accounts additional information for " + str(account_id))
+    url = API_BASE_URL + "/accounts/" + str(account_id)
+
+    if actual_type == "INDIVIDUAL":
+        if account_type == "COMPANY":
+            return {"accountId": account_id}
+        return_key = "individualAccount"
+    elif actual_type == "COMPANY":
+        if account_type == "INDIVIDUAL":
+            return {"accountId": account_id}
+        return_key = "companyAccount"
+    else:
+        raise ValueError("Invalid account type")
+
+    response = await stored_payload_async("details", account_id)
+    if response is None:
+        try:
+            response = await get_request_async(session, url, return_key)
+        except RequestFailedError as err:
+            record_dead_letter("details", account_id, err)
+            return {"accountId": account_id}
+        await store_payload_async("details", account_id, response)
+    return response
+
+
+class FairScheduler:
+    """
+    Shares a fixed number of slots between several pipelines of the asyncio engine.
+
+    Parameters:
+        slots (int): The number of slots that may be held at the same time by all pipelines together.
+
+    Behavior:
+        - `acquire` takes a slot for the given pipeline, waiting if none is free; `release` returns it.
+        - A released slot is handed to the waiting pipelines in turn (round-robin), so a pipeline that
+          queued many accounts early cannot starve the others. Slots not needed by one pipeline
+          are used by the others.
+        - Must be created and used within a single running event loop.
+    """
+
+    def __init__(self, slots: int):
+        self._free = slots
+        self._waiters = {}
+        self._turns = deque()
+
+    async def acquire(self, pipeline: str) -> None:
+        if self._free > 0 and not self._turns:
+            self._free -= 1
+            return
+        waiter = asyncio.get_running_loop().create_future()
+        if pipeline not in self._waiters:
+            self._waiters[pipeline] = deque()
+            self._turns.append(pipeline)
+        self._waiters[pipeline].append(waiter)
+        # a cancelled waiter is skipped by `release`; one cancelled after being granted a slot returns it
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                self.release()
+            raise
+
+    def release(self) -> None:
+        while self._turns:
+            pipeline = self._turns.popleft()
+            waiters = self._waiters[pipeline]
+            waiter = waiters.popleft()
+            if waiters:
+                self._turns.append(pipeline)
+            else:
+                del self._waiters[pipeline]
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self._free += 1
+
+
+async def get_account_details_async(
+    session: aiohttp.ClientSession,
+    account_id,
+    account_type,
+    actual_type,
+    searched_details: asyncio.Task = None,
+) -> dict:
+    """
+    Returns the details of an account from the bulk search if it found the account, and from
+    `get_accounts_additional_information_async` otherwise.
+
+    Parameters:
+        searched_details (asyncio.Task): The running `search_account_details_async` of the account type,
+                                         or None to always fetch the account on its own.
+    """
+    if searched_details is not None:
+        details = await searched_details
+        if details is not None and str(account_id) in details:
+            return {**details[str(account_id)], "accountId": account_id}
+    return await get_accounts_additional_information_async(
+        session, account_id, account_type, actual_type
+    )
+
+
+async def enrich_account_async(
+    session: aiohttp.ClientSession,
+    account_id,
+    account_type,
+    actual_type,
+    searched_details: asyncio.Task = None,
+) -> tuple:
+    """
+    Fetches the memberships and the details of one account at the same time.
+
+    Parameters:
+        session (aiohttp.ClientSession): The session created by `create_async_session`.
+        account_id (str): The ID of the account.
+        account_type (str): The type of the account as listed by the API.
+        actual_type (str): The type of the accounts being extracted ("INDIVIDUAL" or "COMPANY").
+        searched_details (asyncio.Task): See `get_account_details_async`.
+
+    Returns:
+        tuple: The `MembershipRecord` of `get_accounts_type_async` and the dictionary of
+               `get_account_details_async`.
+    """
+    return await asyncio.gather(
+        get_accounts_type_async(session, account_id),
+        get_account_details_async(
+            session, account_id, account_type, actual_type, searched_details
+        ),
+    )
+
+
+async def get_enriched_accounts_async(
+    session: aiohttp.ClientSession, actual: str, scheduler: FairScheduler = None
+) -> tuple:
+    """
+    Lists all accounts of one type and fetches their memberships and details in a single pipeline.
+
+    Parameters:
+        session (aiohttp.ClientSession): The session created by `create_async_session`.
+        actual (str): The type of the accounts to fetch ("INDIVIDUAL" or "COMPANY").
+        scheduler (FairScheduler): The scheduler whose slots bound the accounts enriched at the same time,
+                                   shared with the pipeline of the other account type. Defaults to a
+                                   scheduler of `ACCOUNT_SLOTS` slots used by this pipeline alone.
+
+    Returns:
+        tuple: The listed accounts (pd.DataFrame, in API order) and the list of
+               (MembershipRecord, dict) results of `enrich_account_async`, one per account.
+
+    Behavior:
+        - Starts the membership and detail requests of an account as soon as its listing page arrives,
+          so there is no barrier between the listing, membership and detail stages.
+        - With `BULK_DETAILS`, the details are taken from paginated account searches (`search_account_details_async`)
+          that run alongside the listing; only accounts the search did not return are fetched one by one.
+        - Each account holds a slot of `scheduler` while its requests are in flight. The number of requests
+          is further bounded by the connection limit of the session (`MAX_CONCURRENCY`) and the shared `rate_limiter`.
+    """
+    url = API_BASE_URL + "/accounts?userType=" + actual
+    if scheduler is None:
+        scheduler = FairScheduler(ACCOUNT_SLOTS)
+    searched_details = None
+    if BULK_DETAILS:
+        searched_details = asyncio.create_task(
+            search_account_details_async(session, actual)
+        )
+
+    async def enrich(account_id, user_type):
+        await scheduler.acquire(actual)
+        try:
+            return await enrich_account_async(
+                session, account_id, user_type, actual, searched_details
+            )
+        finally:
+            scheduler.release()
+
+    batches, tasks = [], []
+    async for batch in iter_pages_async(session, url, "accounts"):
+        batches.append(batch)
+        tasks.extend(
+            asyncio.create_task(enrich(account_id, user_type))
+            for account_id, user_type in zip(batch["accountId"], batch["userType"])
+        )
+    logging.debug(f"All accounts of type {actual} received!")
+
+    results = await asyncio.gather(*tasks)
+    return pd.concat(batches).sort_index(), results
+
+
+MEMBERSHIP_COLUMNS = {
+    "Membership Type": "membership_type",
+    "Fee": "fee",
+    "Term End Date": "term_end_date",
+    "Transaction Date": "transaction_date",
+    "Number of Memberships": "total_memberships",
+}
+
+
+def assemble_accounts(
+    account: pd.DataFrame, results: list, actual: str, account_events: dict
+) -> pd.DataFrame:
+    """
+    Builds the enriched account DataFrame from the per-account results of `get_enriched_accounts_async`.
+
+    Parameters:
+        account (pd.DataFrame): The listed accounts.
+        results (list): The (MembershipRecord, dict) results of `enrich_account_async`.
+        actual (str): The type of the accounts, either "INDIVIDUAL" or "COMPANY".
+        account_events (dict): The result of `get_account_events_index_async`, shared by both account types.
+
+    Returns:
+        pd.DataFrame: The listed accounts with their membership columns (`MEMBERSHIP_COLUMNS`), "event_ids",
+                      the flattened details filtered by `filter_individuals`/`filter_companies`, and "Export Date".
+    """
+    records = {record.account_id: record for record, _ in results}
+    for column, field in MEMBERSHIP_COLUMNS.items():
+        account[column] = account["accountId"].map(
+            {id: getattr(record, field) for id, record in records.items()}
+        )
+    account = map_events_to_accounts(account, account_events)
+    account = merge_additional_information(account, [details for _, details in results])
+    flush_snapshot()
 
     if actual == "INDIVIDUAL":
         account = filter_individuals(account)
@@ -692,54 +2194,156 @@ def add_fields_to_account(account: pd.DataFrame, actual) -> pd.DataFrame:
     else:
         raise ValueError("Invalid account type")
 
-    account = add_export_date(account)
+    return add_export_date(account)
+
+
+async def print_all_accounts_to_csv_async(
+    incremental: bool = False, resume: bool = False
+) -> None:
+    """
+    Retrieves all individual and company accounts with the asyncio engine, enriches them and saves them to CSV files.
+
+    Parameters:
+        incremental (bool): Whether to fetch details and memberships only for accounts created or modified
+                            since the previous run and take all others from the snapshot (see `prepare_incremental_run`).
+        resume (bool): Whether to continue an interrupted run: accounts whose payloads are in the journal
+                       are not requested again.
+
+    Behavior:
+        - Opens one shared session (`create_async_session`) for the whole run.
+        - Writes the full membership history of all accounts to `MEMBERSHIPS_TABLE` (see `write_memberships_table`).
+        - Appends every fetched membership and detail payload to the checkpoint journal (`JOURNAL_PATH`),
+          which is kept if the run fails and removed once the CSV files are written.
+        - Runs the event/attendee stage once (`get_account_events_index_async`) alongside the account
+          pipelines and shares its result between individuals and companies, so "events.csv" is written once.
+        - Fetches the memberships and details of every account as soon as it is listed
+          (`get_enriched_accounts_async`), so the run takes as long as its slowest stream
+          instead of the sum of all stages.
+        - Runs the individual and company pipelines at the same time. They share the session, the
+          `rate_limiter` and a `FairScheduler` of `ACCOUNT_SLOTS` slots, which alternates between them.
+        - Records per-endpoint request telemetry and stage durations in `run_metrics` and writes them
+          at the end of the run, even if it failed (see `write_run_metrics`).
+        - Writes "individuals.csv" and "companies.csv" as soon as the respective pipeline has finished,
+          together with the typed "individuals.parquet" and "companies.parquet" (see `write_accounts_table`).
+    """
+    logging.info("Getting all accounts to csv")
+
+    open_journal(resume)
+    completed = False
+    started = time.perf_counter()
+    try:
+        async with create_async_session() as session:
+            if incremental:
+                with run_metrics.stage("incremental"):
+                    await prepare_incremental_run(session)
+
+            async def crawl_events():
+                with run_metrics.stage("events"):
+                    return await get_account_events_index_async(session)
+
+            # the event/attendee crawl runs once for both account types, alongside the account pipelines
+            account_events = asyncio.create_task(crawl_events())
+            scheduler = FairScheduler(ACCOUNT_SLOTS)
+
+            async def extract(actual, name):
+                with run_metrics.stage("accounts " + actual):
+                    accounts, results = await get_enriched_accounts_async(
+                        session, actual, scheduler
+                    )
+                events = await account_events
+                with run_metrics.stage("assemble " + actual):
+                    accounts = assemble_accounts(accounts, results, actual, events)
+                with run_metrics.stage("write " + actual):
+                    accounts.to_csv(name + ".csv", index=False, header=True)
+                    logging.info(f"Wrote {len(accounts)} accounts to {name}.csv")
+                    write_accounts_table(accounts, name + ".parquet")
+                return accounts
+
+            individuals, companies = await asyncio.gather(
+                extract("INDIVIDUAL", "individuals"),
+                extract("COMPANY", "companies"),
+            )
 
-    return account
+        log_connection_stats()
+        write_failure_report()
+        update_high_water_mark([individuals, companies])
+        write_memberships_table()
+        completed = True
+    finally:
+        close_journal(completed)
+        run_metrics.stages["run"] = time.perf_counter() - started
+        write_run_metrics()
 
 
-def print_all_accounts_to_csv() -> None:
+def print_all_accounts_to_csv(incremental: bool = False, resume: bool = False) -> None:
     """
     Retrieves all individual and company accounts, processes them to add additional fields, and saves them to CSV files.
 
     Parameters:
-        None
+        incremental (bool): Whether to fetch details and memberships only for accounts created or modified
+                            since the previous run (see `print_all_accounts_to_csv_async`).
+        resume (bool): Whether to continue an interrupted run from its checkpoint journal.
 
     Returns:
         None
 
     Behavior:
         - Logs the start of the process for retrieving and saving all accounts to CSV.
-        - Retrieves individual account data using `get_accounts_individuals`.
-        - Retrieves company account data using `get_accounts_companies`.
-        - Processes the individual accounts to add additional fields and filters using `add_fields_to_account` with the type "INDIVIDUAL".
-        - Processes the company accounts to add additional fields and filters using `add_fields_to_account` with the type "COMPANY".
+        - Retrieves the individual and company accounts together with their memberships and details
+          using `get_enriched_accounts_async`.
+        - Adds the events and filters the columns of each account type using `assemble_accounts`.
         - Saves the processed individual accounts to a CSV file named "individuals.csv".
         - Saves the processed company accounts to a CSV file named "companies.csv".
 
     Notes:
         - The CSV files are saved with headers included, and the indices are excluded from the files.
         - This function does not return anything; it only performs I/O operations to save the data to files.
+        - This is a thin synchronous wrapper around `print_all_accounts_to_csv_async`, which keeps up to
+          `MAX_CONCURRENCY` requests in flight.
 
     Example:
         print_all_accounts_to_csv()
     """
-    logging.info("Getting all accounts to csv")
-
-    individuals = get_accounts_individuals()
-    companies = get_accounts_companies()
-
-    individuals = add_fields_to_account(individuals, "INDIVIDUAL")
-    companies = add_fields_to_account(companies, "COMPANY")
-
-    individuals.to_csv("individuals.csv", index=False, header=True)
-    companies.to_csv("companies.csv", index=False, header=True)
+    asyncio.run(print_all_accounts_to_csv_async(incremental, resume))
 
 
 def main():
+    global USE_CACHE, REFRESH_ATTENDEES, BULK_DETAILS
+    parser = argparse.ArgumentParser(description="Extract the NeonCRM accounts to CSV.")
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="ignore the on-disk response cache and fetch everything from the API",
+    )
+    parser.add_argument(
+        "--refresh-attendees",
+        action="store_true",
+        help="refetch the attendees of all events, including the ones marked final in the attendee store",
+    )
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="fetch details and memberships only for accounts created or modified since the previous run",
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="continue an interrupted run, skipping the accounts already recorded in its journal",
+    )
+    parser.add_argument(
+        "--bulk-details",
+        action="store_true",
+        help="take the account details from paginated account searches instead of one request per account",
+    )
+    args = parser.parse_args()
+    USE_CACHE = not args.no_cache
+    BULK_DETAILS = args.bulk_details
+    REFRESH_ATTENDEES = args.refresh_attendees
+
     logging.basicConfig(filename="NeonCRMAnalytics.log", level=logging.INFO)
     t1 = time.time()
     logging.info(f"Main program started")
-    print_all_accounts_to_csv()
+    print_all_accounts_to_csv(args.incremental, args.resume)
     logging.info(f"Main Program finished in {time.time() - t1} seconds")
 
 
@@ -1,5 +1,13 @@
+import ast
+import difflib
+import os
+import re
+import unicodedata
 import pandas as pd
 import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
 import plotly.express as px
 import plotly.graph_objects as go
 from typing import List, Tuple
@@ -30,35 +38,428 @@ def get_quality_columns(mode: str):
     return res
 
 
-def fee_vs_member_type(df, enable_raw_values=False):
+# Characters that are not expected in names
+SPECIAL_CHARACTERS = "!@#$%^&*()_+=:;,.<>/?|\\][{}~"
+ACCOUNT_URL = "https://saccsf.app.neoncrm.com/admin/accounts/*/about"
+# "Membership Type" of accounts whose memberships could not be fetched; they are neither members nor non-members
+UNKNOWN_MEMBERSHIP = "Unknown"
+
+# Duplicate detection: accounts are only compared within blocks (same email, same phonetic name, or a shared
+# company-name token). Blocks with more accounts than DUPLICATE_MAX_BLOCK_SIZE (e.g. a very common word in company
+# names) do not discriminate and are skipped, which keeps the number of comparisons linear in the number of accounts.
+DUPLICATE_MAX_BLOCK_SIZE = 50
+# Weight of every agreeing field in the score of a candidate pair; the name counts with its similarity (0 to 1)
+DUPLICATE_WEIGHTS = {
+    "individual": {"email": 0.45, "name": 0.35, "companyName": 0.2},
+    "company": {"name": 0.45, "email": 0.35, "primaryContactAccountId": 0.2},
+}
+# E.g. the same email, the same company name, or a similar name and the same employer or primary contact
+DUPLICATE_MIN_SCORE = 0.45
+# Words of company names that do not identify a company
+COMPANY_STOPWORDS = {
+    "ag",
+    "gmbh",
+    "sa",
+    "sarl",
+    "sagl",
+    "inc",
+    "ltd",
+    "llc",
+    "corp",
+    "co",
+    "kg",
+    "se",
+    "plc",
+    "the",
+    "and",
+    "und",
+    "et",
+    "de",
+    "of",
+}
+
+
+class QualityRule:
     """
-    Counts the number of each member type for each fee.
+    A data-quality check of one or more columns, compiled once and evaluated on the distinct values of a column.
+
+    Attributes:
+    name (str): The name of the rule in the violations table.
+    columns (list): The columns the rule applies to.
+    check (str): What counts as a violation: "missing" (no value), "empty" (an empty list of event IDs),
+                 "characters" (a text containing one of the characters in argument), "pattern" (a value
+                 that does not fully match the regular expression argument) or "values" (a value, or no
+                 value, that is not one of the values in argument).
+    argument: The characters, the regular expression or the allowed values.
+    """
+
+    CHECKS = ["missing", "empty", "characters", "pattern", "values"]
+
+    def __init__(self, name: str, columns: list, check: str, argument=None):
+        if check not in self.CHECKS:
+            raise ValueError(f"Unknown check {check!r}, expected one of {self.CHECKS}")
+        self.name = name
+        self.columns = list(columns)
+        self.check = check
+        self.argument = argument
+        if check == "characters":
+            self.pattern = re.compile(f"[{re.escape(argument)}]")
+        elif check == "pattern":
+            self.pattern = re.compile(argument)
+        # Whether a missing value violates the rule
+        self.on_missing = check in ["missing", "values"]
+
+    def flags(self, uniques: pd.Series) -> np.ndarray:
+        """
+        Returns which of the distinct (non-missing) values of a column violate the rule.
+        """
+        if self.check == "missing":
+            return np.zeros(len(uniques), dtype=bool)
+        if self.check == "empty":
+            if pd.api.types.is_numeric_dtype(uniques.dtype):
+                # event counts (see event_counts)
+                return (uniques == 0).to_numpy()
+            return uniques.map(lambda x: len(parse_event_ids(x)) == 0).to_numpy(
+                dtype=bool
+            )
+        if self.check == "values":
+            return ~uniques.isin(self.argument).to_numpy()
+        text = uniques.astype(str)
+        if self.check == "characters":
+            is_text = uniques.map(lambda x: isinstance(x, str)).to_numpy(dtype=bool)
+            return is_text & text.str.contains(self.pattern).to_numpy(dtype=bool)
+        return ~text.str.fullmatch(self.pattern).to_numpy(dtype=bool)
+
+    def mask(self, values: pd.Series) -> np.ndarray:
+        """
+        Returns which values of a column violate the rule.
+        """
+        codes, uniques = _factorize_values(values)
+        return np.append(self.flags(uniques), self.on_missing)[codes]
+
+
+def _factorize_values(values: pd.Series) -> Tuple[np.ndarray, pd.Series]:
+    """
+    Returns the codes of the values (-1 for missing values) and their distinct values.
+    """
+    codes, uniques = pd.factorize(values)
+    if isinstance(uniques, pd.Categorical):
+        uniques = np.asarray(uniques, dtype=object)
+    return codes, pd.Series(uniques)
+
+
+def get_quality_violations(df: pd.DataFrame, rules: list) -> pd.DataFrame:
+    """
+    Evaluates data-quality rules on all accounts.
 
     Parameters:
     df (pd.DataFrame): The DataFrame containing the data.
-    enable_raw_values (bool): Whether to return raw values. Default is False.
+    rules (list): The rules (QualityRule).
 
     Returns:
-    pd.DataFrame: A DataFrame with the count of each member type for each fee.
+    pd.DataFrame: One row per violation with the columns "accountId", "column" and "rule", indexed like the
+                  accounts of df. The violations are ordered by column (in order of first appearance in the
+                  rules), rule and account.
+
+    Notes:
+    Every column is factorized once and the rules only look at its distinct values, so adding a rule does not add
+    another pass over the accounts. The column "event_ids" is checked on the event counts (see event_counts).
     """
-    fee = df["Fee"]
-    member_type = df["Membership Type"]
+    rules_by_column = {}
+    for rule in rules:
+        for column in rule.columns:
+            rules_by_column.setdefault(column, []).append(rule)
+
+    rows, column_codes, rule_codes = [], [], []
+    rule_names = list(dict.fromkeys(rule.name for rule in rules))
+    for column_code, (column, column_rules) in enumerate(rules_by_column.items()):
+        values = event_counts(df) if column == "event_ids" else df[column]
+        codes, uniques = _factorize_values(values)
+        for rule in column_rules:
+            violations = np.flatnonzero(
+                np.append(rule.flags(uniques), rule.on_missing)[codes]
+            )
+            rows.append(violations)
+            column_codes.append(np.full(len(violations), column_code))
+            rule_codes.append(np.full(len(violations), rule_names.index(rule.name)))
+
+    rows = np.concatenate(rows) if rows else np.array([], dtype=np.int64)
+    return pd.DataFrame(
+        {
+            "accountId": df["accountId"].to_numpy()[rows],
+            "column": pd.Categorical.from_codes(
+                np.concatenate(column_codes or [[]]).astype(int),
+                categories=list(rules_by_column),
+            ),
+            "rule": pd.Categorical.from_codes(
+                np.concatenate(rule_codes or [[]]).astype(int), categories=rule_names
+            ),
+        },
+        index=df.index[rows],
+    )
 
-    fees = fee.unique()
-    types = member_type.unique()
 
-    # Count the number of each member type for each fee
-    values_df = pd.DataFrame(
-        np.zeros((len(types), len(fees))),
-        index=types,
-        columns=fees,
-        dtype=int,
+# Columns read by the report and their types; other columns of the extraction are not loaded
+REPORT_COLUMNS = {
+    "accountId": "str",
+    "userType": "category",
+    "firstName": "str",
+    "lastName": "str",
+    "email": "str",
+    "companyName": "str",
+    "primaryContactAccountId": "str",
+    "Membership Type": "category",
+    "Fee": "float64",
+    "Number of Memberships": "float64",
+    "Term End Date": "datetime",
+    "Transaction Date": "datetime",
+    "timestamps.createdDateTime": "datetime",
+    "timestamps.createdBy": "str",
+    "origin.originDetail": "str",
+    "event_ids": "events",
+}
+# Short names under which the report refers to nested columns
+REPORT_COLUMN_ALIASES = {
+    "timestamps": "timestamps.createdBy",
+    "origin": "origin.originDetail",
+}
+EVENT_IDS_PATTERN = r"\[\s*(?:'?\d+'?\s*(?:,\s*'?\d+'?\s*)*)?\]"
+
+
+class AccountDataset:
+    """
+    The accounts of one type, loaded and parsed once and shared by all metrics.
+
+    Attributes:
+    accounts (pd.DataFrame): The columns of REPORT_COLUMNS with their types. Instead of "event_ids" it has
+                             "event_count", the number of events of the account, which is all the metrics use.
+    """
+
+    def __init__(self, accounts: pd.DataFrame, event_counts: np.ndarray):
+        # A shallow copy gets the new column without touching the caller's DataFrame or copying its data
+        self.accounts = accounts.copy(deep=False)
+        self.accounts["event_count"] = event_counts
+
+
+def count_event_id_strings(values: pd.Series) -> np.ndarray:
+    """
+    Counts the event IDs in the "event_ids" column of a CSV file (strings such as "[1, 2]" or "['1', '2']")
+    in one vectorized pass.
+
+    Parameters:
+    values (pd.Series): The strings. Missing values count as accounts without events.
+
+    Returns:
+    np.ndarray: The number of event IDs of every account (int64).
+
+    Raises:
+    ValueError: If a value is not a list of integers. Unlike eval(), nothing is ever executed.
+    """
+    values = values.fillna("[]").astype(str)
+    malformed = ~values.str.fullmatch(EVENT_IDS_PATTERN)
+    if malformed.any():
+        raise ValueError(f"Malformed event_ids: {values[malformed].iloc[0]!r}")
+    inner = values.str.slice(1, -1).str.strip()
+    counts = np.where(
+        inner.str.len().to_numpy() > 0, inner.str.count(",").to_numpy() + 1, 0
     )
+    return counts.astype(np.int64)
+
+
+def _read_parquet_dataset(path: str) -> AccountDataset:
+    schema = pq.read_schema(path)
+    columns = [column for column in REPORT_COLUMNS if column in schema.names]
+    table = pq.read_table(path, columns=columns)
+    if "event_ids" in columns:
+        # missing lists count as empty lists
+        lengths = pc.fill_null(pc.list_value_length(table.column("event_ids")), 0)
+        if isinstance(lengths, pa.ChunkedArray):
+            lengths = lengths.combine_chunks()
+        counts = np.asarray(lengths, dtype=np.int64)
+        table = table.drop_columns(["event_ids"])
+    else:
+        counts = np.zeros(table.num_rows, dtype=np.int64)
+    accounts = table.to_pandas()
+    # missing strings are None in Parquet, use NaN as read_csv does
+    for column in accounts.columns[accounts.dtypes == object]:
+        accounts[column] = accounts[column].fillna(np.nan)
+    return AccountDataset(accounts, counts)
+
+
+def _read_csv_dataset(path: str) -> AccountDataset:
+    header = pd.read_csv(path, nrows=0).columns
+    columns = [column for column in REPORT_COLUMNS if column in header]
+    dtypes = {
+        column: REPORT_COLUMNS[column]
+        for column in columns
+        if REPORT_COLUMNS[column] in ("str", "category", "float64")
+    }
+    accounts = pd.read_csv(path, usecols=columns, dtype=dtypes)
+    for column in columns:
+        if REPORT_COLUMNS[column] == "datetime":
+            accounts[column] = pd.to_datetime(
+                accounts[column],
+                format="ISO8601",
+                errors="coerce",
+                utc="timestamps" in column,
+            )
+    if "event_ids" in columns:
+        counts = count_event_id_strings(accounts.pop("event_ids"))
+    else:
+        counts = np.zeros(len(accounts), dtype=np.int64)
+    return AccountDataset(accounts, counts)
+
 
-    # Populate the DataFrame
-    for i, f in enumerate(fees):
-        for j, t in enumerate(types):
-            values_df.loc[t, f] = np.sum((fee == f) & (member_type == t))
+def load_dataset(name: str) -> AccountDataset:
+    """
+    Loads the accounts written by the extraction once, preferring the typed Parquet file over the CSV file.
+
+    Parameters:
+    name (str): The name of the files without extension, "individuals" or "companies".
+
+    Returns:
+    AccountDataset: Only the columns of REPORT_COLUMNS, with dates as datetime64 and the number of events per account.
+    """
+    if os.path.exists(f"{name}.parquet"):
+        return _read_parquet_dataset(f"{name}.parquet")
+    return _read_csv_dataset(f"{name}.csv")
+
+
+def load_accounts(name: str) -> pd.DataFrame:
+    """
+    Returns the accounts of load_dataset(name) as a DataFrame.
+    """
+    return load_dataset(name).accounts
+
+
+def event_counts(df: pd.DataFrame) -> pd.Series:
+    """
+    Returns the number of events of every account, from "event_count" if the accounts were loaded
+    with load_dataset and by parsing "event_ids" otherwise.
+    """
+    if "event_count" in df.columns:
+        return df["event_count"]
+    return df["event_ids"].apply(lambda x: len(parse_event_ids(x)))
+
+
+def parse_event_ids(value) -> list:
+    """
+    Returns the event IDs of one account, read either from Parquet (an array) or from CSV (a string such as "[1, 2]").
+
+    Parameters:
+    value: The "event_ids" value of the account.
+
+    Returns:
+    list: The event IDs.
+    """
+    if isinstance(value, str):
+        return ast.literal_eval(value)
+    if value is None:
+        return []
+    return list(value)
+
+
+def _factorize(values: pd.Series) -> Tuple[np.ndarray, pd.Index]:
+    """
+    Returns the codes of the values and their distinct labels in order of first appearance.
+    Missing values get a label of their own, like in Series.unique(), but a negative code.
+    """
+    codes, uniques = pd.factorize(values, use_na_sentinel=False)
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        uniques = pd.Index(np.asarray(uniques))
+    uniques = pd.Index(uniques)
+    codes = np.where(np.asarray(uniques.isna())[codes], -1, codes)
+    return codes, uniques
+
+
+def _order_axis(codes: np.ndarray, labels: pd.Index, buckets=None, order=None):
+    """
+    Merges labels into buckets and puts them in the requested order; see pivot_counts.
+    Works on the distinct labels only and remaps the codes, so the cost does not depend on the number of rows.
+    """
+    if buckets is not None:
+        bucketed = [label if pd.isna(label) else buckets(label) for label in labels]
+        remap, labels = pd.factorize(
+            pd.Series(bucketed, dtype=object), use_na_sentinel=False
+        )
+        labels = pd.Index(labels)
+        if len(labels) and labels.inferred_type == "integer":
+            labels = labels.astype(np.int64)
+        codes = np.where(codes >= 0, remap[np.maximum(codes, 0)], -1)
+    if order is None:
+        return codes, labels
+    if order == "sorted":
+        order = sorted(labels[~pd.isna(labels)]) + list(labels[pd.isna(labels)])
+    order = pd.Index(order)
+    remap = order.get_indexer(labels)
+    codes = np.where(
+        codes >= 0, remap[np.maximum(codes, 0)] if len(remap) else codes, -1
+    )
+    return codes, order
+
+
+def pivot_counts(
+    rows: pd.Series,
+    columns: pd.Series,
+    row_buckets=None,
+    column_buckets=None,
+    row_order=None,
+    column_order=None,
+    totals: str = None,
+    total_label: str = "Grand Total",
+) -> pd.DataFrame:
+    """
+    Counts the rows of every combination of two columns in a single pass (crosstab).
+
+    Parameters:
+    rows (pd.Series): The values that become the index of the table.
+    columns (pd.Series): The values that become the columns of the table, aligned with rows.
+    row_buckets (callable): Maps a row label to the bucket it is counted in, e.g. lambda n: n if n <= 3 else "4+". Default is None.
+    column_buckets (callable): The same for the column labels. Default is None.
+    row_order (list or str): The labels of the index in the order to show them, or "sorted". Labels without rows
+                             are shown with zeros, labels not listed are left out. Default is the order of first appearance.
+    column_order (list or str): The same for the columns. Default is the order of first appearance.
+    totals (str): Adds a total_label column with the sum of every row ("columns"), a total_label row with the sum
+                  of every column ("rows"), or both ("both"). Default is None.
+    total_label (str): The label of the totals. Default is "Grand Total".
+
+    Returns:
+    pd.DataFrame: The number of rows of every combination as integers. Missing values appear as labels
+                  (like in Series.unique()) but are never counted.
+    """
+    row_codes, row_labels = _factorize(rows)
+    column_codes, column_labels = _factorize(columns)
+    row_codes, row_labels = _order_axis(row_codes, row_labels, row_buckets, row_order)
+    column_codes, column_labels = _order_axis(
+        column_codes, column_labels, column_buckets, column_order
+    )
+
+    counted = (row_codes >= 0) & (column_codes >= 0)
+    cells = np.bincount(
+        row_codes[counted] * len(column_labels) + column_codes[counted],
+        minlength=len(row_labels) * len(column_labels),
+    ).reshape(len(row_labels), len(column_labels))
+    values_df = pd.DataFrame(cells, index=row_labels, columns=column_labels, dtype=int)
+
+    if totals in ("columns", "both"):
+        values_df[total_label] = values_df.sum(axis=1)
+    if totals in ("rows", "both"):
+        values_df.loc[total_label] = values_df.sum(axis=0)
+    return values_df
+
+
+def fee_vs_member_type(df, enable_raw_values=False):
+    """
+    Counts the number of each member type for each fee.
+
+    Parameters:
+    df (pd.DataFrame): The DataFrame containing the data.
+    enable_raw_values (bool): Whether to return raw values. Default is False.
+
+    Returns:
+    pd.DataFrame: A DataFrame with the count of each member type for each fee.
+    """
+    values_df = pivot_counts(df["Membership Type"], df["Fee"])
 
     # Rename the columns with a $ sign
     raw_values = list(values_df.columns.copy())
@@ -129,42 +530,22 @@ def membership_type_vs_events(df: pd.DataFrame) -> pd.DataFrame:
     Returns:
     pd.DataFrame: A DataFrame with the count of each member type for each event.
     """
-    events = df["event_ids"]
-    num_events = events.apply(lambda x: len(eval(x)))
-    member_type = df["Membership Type"]
+    num_events = event_counts(df)
+    member_type = df["Membership Type"].astype(object)
 
     past_members = get_past_members(df)
     # change the past members to "Past Member"
     member_type[past_members.index] = "Past Member"
 
-    event = num_events.unique()
-    types = member_type.unique()
-
-    # Count the number of each member type for each fee
-    values_df = pd.DataFrame(
-        np.zeros((len(types), len(event))),
-        index=types,
-        columns=event,
-        dtype=int,
+    # Combine the accounts with more than 3 events and add grand totals
+    return pivot_counts(
+        member_type,
+        num_events,
+        column_buckets=lambda n: n if n <= 3 else "4+",
+        column_order=[0, 1, 2, 3, "4+"],
+        totals="both",
     )
 
-    # Populate the DataFrame
-    for i, e in enumerate(event):
-        for j, t in enumerate(types):
-            values_df.loc[t, e] = np.sum((num_events == e) & (member_type == t))
-
-    # Get all columns except "0", "1", "2", "3"
-    columns = list(values_df.columns[values_df.columns > 3])
-    # combine the columns
-    values_df["4+"] = values_df[columns].sum(axis=1)
-    values_df.drop(columns=columns, inplace=True)
-    # Reorder the columns
-    values_df = values_df[[0, 1, 2, 3, "4+"]]
-    # Add grand totals
-    values_df["Grand Total"] = values_df.sum(axis=1)
-    values_df.loc["Grand Total"] = values_df.sum(axis=0)
-    return values_df
-
 
 def number_of_membership_vs_membership_type(df: pd.DataFrame):
     """
@@ -176,34 +557,14 @@ def number_of_membership_vs_membership_type(df: pd.DataFrame):
     Returns:
     pd.DataFrame: A DataFrame with the count of each membership type.
     """
-    membership_type = df["Membership Type"]
-    number_of_memberships = df["Number of Memberships"]
-
-    types = membership_type.unique()
-    memberships = number_of_memberships.unique()
-
-    # Count the number of each member type for each fee
-    values_df = pd.DataFrame(
-        np.zeros((len(types), len(memberships))),
-        index=types,
-        columns=memberships,
-        dtype=int,
+    # Number of memberships in ascending order, with a column with the sum of all the rows
+    return pivot_counts(
+        df["Number of Memberships"],
+        df["Membership Type"],
+        row_order="sorted",
+        totals="columns",
     )
 
-    # Populate the DataFrame
-    for i, m in enumerate(memberships):
-        for j, t in enumerate(types):
-            values_df.loc[t, m] = np.sum(
-                (number_of_memberships == m) & (membership_type == t)
-            )
-
-    # sort orders
-    values_df = values_df[sorted(values_df.columns)].T
-
-    # Create column with the sum of all the rows
-    values_df["Grand Total"] = values_df.sum(axis=1)
-    return values_df
-
 
 def get_missing_ids(df: pd.DataFrame, col: str) -> pd.DataFrame:
     """
@@ -230,7 +591,8 @@ def get_empty_ids(df: pd.DataFrame, col: str) -> pd.DataFrame:
     Returns:
     pd.DataFrame: A DataFrame with the IDs of empty values.
     """
-    return df[df[col].apply(lambda x: len(eval(x)) == 0)]["accountId"].values
+    violations = get_quality_violations(df, [QualityRule("empty", [col], "empty")])
+    return violations["accountId"].values
 
 
 def get_special_characters_id(df: pd.DataFrame, col: str) -> pd.DataFrame:
@@ -244,41 +606,8 @@ def get_special_characters_id(df: pd.DataFrame, col: str) -> pd.DataFrame:
     Returns:
     pd.DataFrame: A DataFrame with the IDs of values with special characters.
     """
-    special_chars = [
-        "!",
-        "@",
-        "#",
-        "$",
-        "%",
-        "^",
-        "&",
-        "*",
-        "(",
-        ")",
-        "_",
-        "+",
-        "=",
-        ":",
-        ";",
-        ",",
-        ".",
-        "<",
-        ">",
-        "/",
-        "?",
-        "|",
-        "\\",
-        "]",
-        "[",
-        "{",
-        "}",
-        "~",
-    ]
-    return df[
-        df[col].apply(
-            lambda x: isinstance(x, str) and any(char in x for char in special_chars)
-        )
-    ][["accountId", "firstName", "lastName"]]
+    rule = QualityRule("specialCharacters", [col], "characters", SPECIAL_CHARACTERS)
+    return df[rule.mask(df[col])][["accountId", "firstName", "lastName"]]
 
 
 def get_plotly_list_nan_values(df: pd.DataFrame, columns: list, mode: str) -> list:
@@ -293,22 +622,22 @@ def get_plotly_list_nan_values(df: pd.DataFrame, columns: list, mode: str) -> li
     Returns:
     list: A list of Plotly charts for NaN values.
     """
-    charts = {}
+    missing = df[[REPORT_COLUMN_ALIASES.get(c, c) for c in columns]].isna().sum()
+    return _missing_data_charts(len(df), missing.to_numpy(), columns, mode)
+
+
+def _missing_data_charts(accounts: int, missing, columns: list, mode: str) -> list:
+    """
+    Returns a pie chart of valid and missing data for every column, with its report URL and name.
+    """
     url_dict = fetch_report_urls(columns, mode)
-    filter_columns = ["accountId"] + columns
-    plotly_df = df.rename(
-        columns={
-            "timestamps.createdBy": "timestamps",
-            "origin.originDetail": "origin",
-        }
-    )[filter_columns]
-    for column in columns:
-        nan_ids = get_missing_ids(plotly_df, column)
+    charts = {}
+    for column, missing_count in zip(columns, missing):
         plotly_fig = go.Figure(
             data=[
                 go.Pie(
                     labels=["Valid Data", "Missing Data"],
-                    values=[len(plotly_df) - len(nan_ids), len(nan_ids)],
+                    values=[accounts - int(missing_count), int(missing_count)],
                     hole=0.3,
                 )
             ]
@@ -335,20 +664,39 @@ def get_name_inconsistencies(individuals: pd.DataFrame) -> pd.DataFrame:
     Returns:
     pd.DataFrame: A DataFrame with name inconsistencies.
     """
-    first_name = get_special_characters_id(individuals, "firstName")
-    last_name = get_special_characters_id(individuals, "lastName")
+    return _name_inconsistencies(individuals).reset_index(drop=True)
 
-    # Concat the with an additional column stating the column of the special character
-    first_name["where"] = "firstName"
-    last_name["where"] = "lastName"
-    res = pd.concat([first_name, last_name])
-    res.reset_index(drop=True, inplace=True)
+
+def _name_inconsistencies(individuals: pd.DataFrame) -> pd.DataFrame:
+    """
+    Returns the name inconsistencies indexed by the index of the accounts they belong to.
+    """
+    rule = QualityRule(
+        "specialCharacters", ["firstName", "lastName"], "characters", SPECIAL_CHARACTERS
+    )
+    violations = get_quality_violations(individuals, [rule])
+    res = individuals.loc[violations.index, ["accountId", "firstName", "lastName"]]
+    # Add a column stating the column of the special character
+    res["where"] = violations["column"].to_numpy(dtype=object)
     # Add url to the DataFrame
-    base_url = "https://saccsf.app.neoncrm.com/admin/accounts/*/about"
-    res["url"] = res["accountId"].astype(str).apply(lambda x: base_url.replace("*", x))
+    res["url"] = get_account_urls(res["accountId"])
     return res
 
 
+def get_account_urls(account_ids: pd.Series) -> pd.Series:
+    """
+    Returns the NeonCRM page of every account.
+
+    Parameters:
+    account_ids (pd.Series): The account IDs.
+
+    Returns:
+    pd.Series: The URLs.
+    """
+    prefix, suffix = ACCOUNT_URL.split("*")
+    return prefix + account_ids.astype(str) + suffix
+
+
 def get_wrong_user_type_ids(df: pd.DataFrame, expected_value: str) -> pd.DataFrame:
     """
     Returns the IDs of rows with wrong user types.
@@ -360,7 +708,269 @@ def get_wrong_user_type_ids(df: pd.DataFrame, expected_value: str) -> pd.DataFra
     Returns:
     pd.DataFrame: A DataFrame with the IDs of rows with wrong user types.
     """
-    return df[df["userType"] != expected_value]["accountId"].to_list()
+    rule = QualityRule("wrongUserType", ["userType"], "values", [expected_value])
+    return df[rule.mask(df["userType"])]["accountId"].to_list()
+
+
+def _map_distinct(values: pd.Series, function) -> np.ndarray:
+    """
+    Applies a function to the distinct non-missing values only and returns the results for all values (None if missing).
+    """
+    codes, uniques = _factorize_values(values)
+    results = np.empty(len(uniques) + 1, dtype=object)
+    results[:-1] = [function(value) for value in uniques]
+    return results[codes]
+
+
+def normalize_text(value) -> str:
+    """
+    Returns a value as lowercase ASCII text with single spaces between words and without punctuation, or None if
+    nothing remains.
+    """
+    text = (
+        unicodedata.normalize("NFKD", str(value))
+        .encode("ascii", "ignore")
+        .decode()
+        .lower()
+    )
+    text = " ".join(re.sub(r"[^a-z0-9]+", " ", text).split())
+    return text or None
+
+
+def normalize_email(value) -> str:
+    """
+    Returns an email address in lowercase and without a "+tag" in its local part.
+    """
+    email = str(value).strip().lower()
+    return re.sub(r"\+[^@]*@", "@", email) or None
+
+
+SOUNDEX_CODES = {
+    letter: digit
+    for digit, letters in {
+        "1": "bfpv",
+        "2": "cgjkqsxz",
+        "3": "dt",
+        "4": "l",
+        "5": "mn",
+        "6": "r",
+    }.items()
+    for letter in letters
+}
+
+
+def soundex(name) -> str:
+    """
+    Returns the Soundex code of a name (e.g. "R163" for "Robert" and "Rupert"), or None if it has no letters.
+    """
+    letters = [c for c in (normalize_text(name) or "") if "a" <= c <= "z"]
+    if not letters:
+        return None
+    code, last = letters[0].upper(), SOUNDEX_CODES.get(letters[0], "")
+    for letter in letters[1:]:
+        digit = SOUNDEX_CODES.get(letter, "")
+        if digit and digit != last:
+            code += digit
+        if letter not in "hw":
+            last = digit
+    return (code + "000")[:4]
+
+
+def company_tokens(name) -> list:
+    """
+    Returns the distinct words of a company name that identify it (without legal forms and stopwords).
+    """
+    words = (normalize_text(name) or "").split()
+    return sorted(
+        {word for word in words if len(word) > 1 and word not in COMPANY_STOPWORDS}
+    )
+
+
+def _candidate_pairs(keys: pd.DataFrame) -> pd.DataFrame:
+    """
+    Returns the distinct pairs of rows (row_a < row_b) that share a blocking key.
+
+    Parameters:
+    keys (pd.DataFrame): The blocking keys, one row per key of an account, with the columns "key" and "row".
+    """
+    keys = keys.dropna().drop_duplicates()
+    sizes = keys.groupby("key")["row"].transform("size")
+    keys = keys[(sizes > 1) & (sizes <= DUPLICATE_MAX_BLOCK_SIZE)]
+    pairs = keys.merge(keys, on="key", suffixes=("_a", "_b"))
+    pairs = pairs[pairs["row_a"] < pairs["row_b"]]
+    return pairs[["row_a", "row_b"]].drop_duplicates().reset_index(drop=True)
+
+
+def _duplicate_fields(df: pd.DataFrame, mode: str) -> dict:
+    """
+    Returns the normalized fields compared by the duplicate detection, one array per field of DUPLICATE_WEIGHTS.
+    """
+    fields = {"email": _map_distinct(df["email"], normalize_email)}
+    if mode == "individual":
+        first_names = _map_distinct(df["firstName"], normalize_text)
+        last_names = _map_distinct(df["lastName"], normalize_text)
+        fields["name"] = np.array(
+            [
+                f"{first} {last}" if first and last else first or last
+                for first, last in zip(first_names, last_names)
+            ],
+            dtype=object,
+        )
+    else:
+        fields["name"] = _map_distinct(df["companyName"], normalize_text)
+    for column in DUPLICATE_WEIGHTS[mode]:
+        if column not in fields:
+            fields[column] = _map_distinct(df[column], normalize_text)
+    return fields
+
+
+def get_duplicate_candidates(df: pd.DataFrame, mode: str) -> pd.DataFrame:
+    """
+    Returns the pairs of accounts that share a blocking key and are compared by get_duplicate_accounts.
+
+    Parameters:
+    df (pd.DataFrame): The DataFrame containing the data.
+    mode (str): The account type. It can be either "individual" or "company".
+
+    Returns:
+    pd.DataFrame: The pairs with the positions of the accounts in df in the columns "row_a" and "row_b" (row_a < row_b).
+                  The blocking keys are the normalized email and, for individuals, the Soundex codes of last and first
+                  name or, for companies, every word of the company name (see company_tokens).
+    """
+    rows = np.arange(len(df))
+    keys = [
+        pd.DataFrame(
+            {
+                "key": "email:"
+                + pd.Series(_map_distinct(df["email"], normalize_email)),
+                "row": rows,
+            }
+        )
+    ]
+    if mode.lower() == "individual":
+        phonetic = [
+            f"name:{last}{first}" if first and last else None
+            for first, last in zip(
+                _map_distinct(df["firstName"], soundex),
+                _map_distinct(df["lastName"], soundex),
+            )
+        ]
+        keys.append(pd.DataFrame({"key": phonetic, "row": rows}))
+    else:
+        tokens = pd.Series(_map_distinct(df["companyName"], company_tokens)).explode()
+        keys.append(pd.DataFrame({"key": "token:" + tokens, "row": tokens.index}))
+    return _candidate_pairs(pd.concat(keys, ignore_index=True))
+
+
+def score_duplicate_pairs(
+    df: pd.DataFrame, mode: str, pairs: pd.DataFrame, min_score: float = 0.0
+) -> pd.DataFrame:
+    """
+    Scores pairs of accounts as duplicates.
+
+    Parameters:
+    df (pd.DataFrame): The DataFrame containing the data.
+    mode (str): The account type. It can be either "individual" or "company".
+    pairs (pd.DataFrame): The positions of the accounts in df in the columns "row_a" and "row_b".
+    min_score (float): Only pairs with at least this score are returned. Default is 0.0 (all pairs).
+
+    Returns:
+    pd.DataFrame: The pairs with a "score" column (see DUPLICATE_WEIGHTS) and one column per field of
+                  DUPLICATE_WEIGHTS: the similarity of the names (0 to 1) and whether the other fields agree.
+
+    Notes:
+    The exact fields are compared first. The (slow) name similarity is only computed for pairs that can still
+    reach min_score with it.
+    """
+    mode = mode.lower()
+    weights = DUPLICATE_WEIGHTS[mode]
+    fields = _duplicate_fields(df, mode)
+    a, b = pairs["row_a"].to_numpy(), pairs["row_b"].to_numpy()
+    scored = pairs[["row_a", "row_b"]].reset_index(drop=True)
+    for column, values in fields.items():
+        if column != "name":
+            scored[column] = pd.notna(values[a]) & (values[a] == values[b])
+    exact_score = sum(
+        weights[column] * scored[column] for column in weights if column != "name"
+    )
+    # The name similarity each pair needs to reach min_score
+    needed = ((min_score - exact_score) / weights["name"]).to_numpy()
+    names = fields["name"]
+    similarity = np.zeros(len(scored))
+    candidates = np.flatnonzero((needed <= 1) & pd.notna(names[a]) & pd.notna(names[b]))
+    # Pairs with the same second name reuse the matcher, which caches its analysis of the second name
+    candidates = candidates[np.argsort(names[b[candidates]], kind="stable")]
+    matcher = difflib.SequenceMatcher(None)
+    for i in candidates:
+        if names[b[i]] != matcher.b:
+            matcher.set_seq2(names[b[i]])
+        matcher.set_seq1(names[a[i]])
+        if (
+            matcher.real_quick_ratio() >= needed[i]
+            and matcher.quick_ratio() >= needed[i]
+        ):
+            similarity[i] = matcher.ratio()
+    scored["name"] = similarity
+    scored["score"] = exact_score + weights["name"] * similarity
+    return scored[scored["score"] >= min_score].reset_index(drop=True)
+
+
+def get_duplicate_accounts(df: pd.DataFrame, mode: str) -> pd.DataFrame:
+    """
+    Returns pairs of accounts that are probably duplicates of each other.
+
+    Parameters:
+    df (pd.DataFrame): The DataFrame containing the data.
+    mode (str): The account type. It can be either "individual" or "company".
+
+    Returns:
+    pd.DataFrame: One row per pair with the columns "accountId", "name", "duplicateAccountId", "duplicateName",
+                  "score", "match" (the fields that agree), "url" and "duplicateUrl", the most likely duplicates first.
+
+    Notes:
+    Only the columns of get_quality_columns are used. Accounts are only compared with the accounts they share a
+    blocking key with (see get_duplicate_candidates and DUPLICATE_MAX_BLOCK_SIZE), so the run time grows about
+    linearly with the number of accounts. Pairs are reported from a score of DUPLICATE_MIN_SCORE on.
+    """
+    mode = mode.lower()
+    scored = score_duplicate_pairs(
+        df, mode, get_duplicate_candidates(df, mode), DUPLICATE_MIN_SCORE
+    )
+    columns = list(DUPLICATE_WEIGHTS[mode])
+    # A name counts as agreeing from a similarity of 0.9 on
+    agreeing = (
+        scored[columns] >= [0.9 if column == "name" else 1 for column in columns]
+    ).to_numpy()
+
+    account_ids = df["accountId"].astype(str).to_numpy()
+    if mode == "individual":
+        names = (
+            df["firstName"].fillna("").astype(str)
+            + " "
+            + df["lastName"].fillna("").astype(str)
+        )
+    else:
+        names = df["companyName"].fillna("").astype(str)
+    names = names.str.strip().to_numpy()
+    a, b = scored["row_a"].to_numpy(), scored["row_b"].to_numpy()
+    duplicates = pd.DataFrame(
+        {
+            "accountId": account_ids[a],
+            "name": names[a],
+            "duplicateAccountId": account_ids[b],
+            "duplicateName": names[b],
+            "score": scored["score"].round(2).to_numpy(),
+            "match": [", ".join(np.array(columns)[row]) for row in agreeing],
+        }
+    )
+    duplicates = duplicates.sort_values(
+        ["score", "accountId", "duplicateAccountId"],
+        ascending=[False, True, True],
+        kind="stable",
+    ).reset_index(drop=True)
+    duplicates["url"] = get_account_urls(duplicates["accountId"])
+    duplicates["duplicateUrl"] = get_account_urls(duplicates["duplicateAccountId"])
+    return duplicates
 
 
 def get_account_creation_date_plot(df: pd.DataFrame) -> go.Figure:
@@ -368,32 +978,33 @@ def get_account_creation_date_plot(df: pd.DataFrame) -> go.Figure:
     Plots account creation dates by quarter.
 
     Parameters:
-    individuals (pd.DataFrame): The DataFrame containing individual accounts.
-    companies (pd.DataFrame): The DataFrame containing company accounts.
+    df (pd.DataFrame): The DataFrame containing the accounts.
 
     Returns:
     go.Figure: A Plotly figure with account creation dates by quarter.
     """
-    accounts = df.copy()
-    accounts["timestamps.createdDateTime"] = pd.to_datetime(
-        accounts["timestamps.createdDateTime"]
-    )
+    created = pd.to_datetime(df["timestamps.createdDateTime"])
 
     # Remove the rows with NaN values
-    accounts = accounts[~pd.isna(accounts["timestamps.createdDateTime"])]
+    created = created[~pd.isna(created)]
 
     # Group the dates by quarters and convert to integers
-    accounts["Quarter"] = accounts["timestamps.createdDateTime"].dt.quarter.astype(int)
-    accounts["Year"] = accounts["timestamps.createdDateTime"].dt.year.astype(int)
+    quarters = created.dt.quarter.astype(int)
+    years = created.dt.year.astype(int)
+    return _creation_date_figure(
+        {quarter: years[quarters == quarter] for quarter in sorted(quarters.unique())}
+    )
 
-    # Create a histogram based on the quarters
-    fig = go.Figure()
-    for quarter in sorted(accounts["Quarter"].unique()):
-        quarter_df = accounts[accounts["Quarter"] == quarter]
 
+def _creation_date_figure(years_by_quarter: dict) -> str:
+    """
+    Returns a histogram of the creation years with one trace per quarter.
+    """
+    fig = go.Figure()
+    for quarter, years in years_by_quarter.items():
         fig.add_trace(
             go.Histogram(
-                x=quarter_df["Year"],
+                x=years,
                 name=f"Q{quarter}",
                 histfunc="count",
                 xbins=dict(size=1),
@@ -467,9 +1078,17 @@ def get_members(df) -> pd.DataFrame:
     df (pd.DataFrame): The DataFrame containing the data.
 
     Returns:
-    pd.DataFrame: A DataFrame with only active accounts.
+    pd.DataFrame: A DataFrame with only active accounts. Accounts whose membership is unknown are left out.
+    """
+    return df[known_membership(df) & (df["Membership Type"] != "No Membership active")]
+
+
+def known_membership(df: pd.DataFrame) -> pd.Series:
+    """
+    Returns whether the memberships of every account could be fetched, i.e. its "Membership Type" is neither
+    UNKNOWN_MEMBERSHIP nor missing.
     """
-    return df[df["Membership Type"] != "No Membership active"]
+    return df["Membership Type"].notna() & (df["Membership Type"] != UNKNOWN_MEMBERSHIP)
 
 
 def get_non_members(df) -> pd.DataFrame:
@@ -500,6 +1119,252 @@ def get_past_members(df: pd.DataFrame) -> pd.DataFrame:
     return past_members
 
 
+# Segments of the report. They overlap: "both" are members and past members, "all" are all accounts.
+SEGMENTS = ["members", "nonMembers", "pastMembers", "both", "all"]
+
+
+def get_segments(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Labels every account with the report segments it belongs to.
+
+    Parameters:
+    df (pd.DataFrame): The DataFrame containing the data.
+
+    Returns:
+    pd.DataFrame: One row per account and segment, with the columns "segment" (categorical, see SEGMENTS)
+                  and "row" (the position of the account in df). Accounts appear in the same order in every segment.
+                  Accounts whose membership is unknown (see known_membership) are only in "all".
+    """
+    non_members = (df["Membership Type"] == "No Membership active").to_numpy()
+    members = known_membership(df).to_numpy() & ~non_members
+    past_members = non_members & (df["Number of Memberships"] > 0).to_numpy()
+    masks = [
+        members,
+        non_members,
+        past_members,
+        members | past_members,
+        np.ones(len(df), dtype=bool),
+    ]
+    rows = [np.flatnonzero(mask) for mask in masks]
+    codes = np.repeat(np.arange(len(SEGMENTS)), [len(r) for r in rows])
+    return pd.DataFrame(
+        {
+            "segment": pd.Categorical.from_codes(codes, categories=SEGMENTS),
+            "row": np.concatenate(rows),
+        }
+    )
+
+
+def get_segment(df: pd.DataFrame, segments: pd.DataFrame, segment: str) -> pd.DataFrame:
+    """
+    Returns the accounts of one segment.
+
+    Parameters:
+    df (pd.DataFrame): The DataFrame containing the data.
+    segments (pd.DataFrame): The segments of df (see get_segments).
+    segment (str): The segment.
+
+    Returns:
+    pd.DataFrame: The accounts of the segment.
+    """
+    return df.iloc[
+        segments["row"].to_numpy()[(segments["segment"] == segment).to_numpy()]
+    ]
+
+
+def get_plotly_list_nan_values_by_segment(
+    df: pd.DataFrame, segments: pd.DataFrame, columns: list, mode: str
+) -> dict:
+    """
+    Returns the charts of get_plotly_list_nan_values for every segment, counting the missing values of all
+    segments in a single groupby.
+
+    Parameters:
+    df (pd.DataFrame): The DataFrame containing the data.
+    segments (pd.DataFrame): The segments of df (see get_segments).
+    columns (list): The list of columns to check for NaN values.
+    mode (str): The mode for which the charts are needed.
+
+    Returns:
+    dict: The list of charts of every segment.
+    """
+    missing = df[[REPORT_COLUMN_ALIASES.get(c, c) for c in columns]].isna().to_numpy()
+    counts = pd.DataFrame(missing[segments["row"].to_numpy()], columns=columns)
+    counts.insert(0, "accounts", 1)
+    counts = counts.groupby(segments["segment"], observed=False).sum()
+    return {
+        segment: _missing_data_charts(
+            counts.at[segment, "accounts"], counts.loc[segment, columns], columns, mode
+        )
+        for segment in SEGMENTS
+    }
+
+
+def get_name_inconsistencies_by_segment(
+    individuals: pd.DataFrame, segments: pd.DataFrame
+) -> dict:
+    """
+    Returns the name inconsistencies (see get_name_inconsistencies) of every segment. The names are checked once,
+    the inconsistencies are then split by segment.
+
+    Parameters:
+    individuals (pd.DataFrame): The DataFrame containing the data.
+    segments (pd.DataFrame): The segments of individuals (see get_segments).
+
+    Returns:
+    dict: The name inconsistencies of every segment.
+    """
+    inconsistencies = _name_inconsistencies(individuals)
+    rows = individuals.index.get_indexer(inconsistencies.index)
+    in_segment = np.zeros((len(SEGMENTS), len(individuals)), dtype=bool)
+    codes = segments["segment"].cat.codes.to_numpy()
+    in_segment[codes, segments["row"].to_numpy()] = True
+    return {
+        segment: inconsistencies[in_segment[code, rows]].reset_index(drop=True)
+        for code, segment in enumerate(SEGMENTS)
+    }
+
+
+def get_account_creation_date_plot_by_segment(
+    df: pd.DataFrame, segments: pd.DataFrame
+) -> dict:
+    """
+    Returns the account creation date plots (see get_account_creation_date_plot) of every segment, grouping the
+    creation dates of all segments by segment and quarter in a single groupby.
+
+    Parameters:
+    df (pd.DataFrame): The DataFrame containing the data.
+    segments (pd.DataFrame): The segments of df (see get_segments).
+
+    Returns:
+    dict: The plot of every segment.
+    """
+    created = pd.to_datetime(df["timestamps.createdDateTime"])
+    valid = created.notna().to_numpy()
+    labels = segments[valid[segments["row"].to_numpy()]]
+    rows = labels["row"].to_numpy()
+    dates = pd.DataFrame(
+        {
+            "segment": labels["segment"].to_numpy(),
+            "Quarter": created.dt.quarter.to_numpy()[rows].astype(int),
+            "Year": created.dt.year.to_numpy()[rows].astype(int),
+        }
+    )
+    years_by_quarter = {segment: {} for segment in SEGMENTS}
+    for (segment, quarter), years in dates.groupby(
+        ["segment", "Quarter"], observed=True, sort=True
+    )["Year"]:
+        years_by_quarter[segment][quarter] = years
+    return {
+        segment: _creation_date_figure(years_by_quarter[segment])
+        for segment in SEGMENTS
+    }
+
+
+def load_memberships(path: str = "memberships.parquet") -> pd.DataFrame:
+    """
+    Loads the long-format membership history written by the extraction.
+
+    Parameters:
+    path (str): The Parquet file with one row per membership term. Default is "memberships.parquet".
+
+    Returns:
+    pd.DataFrame: The membership terms with the date columns as datetime64.
+    """
+    memberships = pd.read_parquet(path)
+    for column in ["termStartDate", "termEndDate", "transactionDate"]:
+        memberships[column] = pd.to_datetime(memberships[column])
+    return memberships
+
+
+def get_membership_terms(
+    memberships: pd.DataFrame, grace_days: int = 90, today=None
+) -> pd.DataFrame:
+    """
+    Annotates every membership term with its renewal outcome.
+
+    Parameters:
+    memberships (pd.DataFrame): The membership history (see load_memberships).
+    grace_days (int): The number of days after the end of a term within which a new term counts as a renewal. Default is 90.
+    today (pd.Timestamp): The reference date. Default is the current date.
+
+    Returns:
+    pd.DataFrame: The terms sorted by account and start date, with the additional columns
+                  "nextTermStartDate", "gapDays" (days between the end of the term and the start of the next one),
+                  "renewed" (the next term started within the grace period), and "lapsed"
+                  (the grace period is over and the term was not renewed).
+    """
+    today = pd.Timestamp.today().normalize() if today is None else pd.Timestamp(today)
+    terms = memberships.sort_values(
+        ["accountId", "termStartDate", "termEndDate"], kind="stable"
+    ).reset_index(drop=True)
+    terms["nextTermStartDate"] = terms.groupby("accountId")["termStartDate"].shift(-1)
+    terms["gapDays"] = (terms["nextTermStartDate"] - terms["termEndDate"]).dt.days
+    terms["renewed"] = (terms["gapDays"] <= grace_days).to_numpy()
+    grace_over = (
+        terms["termEndDate"] + pd.Timedelta(days=grace_days) < today
+    ).to_numpy()
+    terms["lapsed"] = grace_over & ~terms["renewed"]
+    return terms
+
+
+def get_renewal_rates(
+    memberships: pd.DataFrame, grace_days: int = 90, today=None
+) -> pd.DataFrame:
+    """
+    Computes renewal and churn rates by the year in which the membership terms ended.
+
+    Parameters:
+    memberships (pd.DataFrame): The membership history (see load_memberships).
+    grace_days (int): The number of days after the end of a term within which a new term counts as a renewal. Default is 90.
+    today (pd.Timestamp): The reference date. Default is the current date.
+
+    Returns:
+    pd.DataFrame: One row per year with the columns "Terms Ended", "Renewed", "Lapsed", "Renewal Rate" and "Churn Rate".
+                  Only terms whose outcome is known (renewed, or grace period over) are counted.
+    """
+    terms = get_membership_terms(memberships, grace_days, today)
+    decided = terms[terms["renewed"] | terms["lapsed"]]
+    rates = decided.groupby(decided["termEndDate"].dt.year.rename("Year")).agg(
+        **{
+            "Terms Ended": ("renewed", "size"),
+            "Renewed": ("renewed", "sum"),
+            "Lapsed": ("lapsed", "sum"),
+        }
+    )
+    rates["Renewal Rate"] = rates["Renewed"] / rates["Terms Ended"]
+    rates["Churn Rate"] = rates["Lapsed"] / rates["Terms Ended"]
+    return rates
+
+
+def get_lapse_durations(
+    memberships: pd.DataFrame, grace_days: int = 90, today=None
+) -> pd.DataFrame:
+    """
+    Returns the duration of every lapse, i.e. every term that was not renewed within the grace period.
+
+    Parameters:
+    memberships (pd.DataFrame): The membership history (see load_memberships).
+    grace_days (int): The number of days after the end of a term within which a new term counts as a renewal. Default is 90.
+    today (pd.Timestamp): The reference date. Default is the current date.
+
+    Returns:
+    pd.DataFrame: One row per lapse with the columns "accountId", "termEndDate", "nextTermStartDate",
+                  "returned" (the account joined again later) and "lapseDays" (days until it joined again,
+                  or days since the end of the term for accounts that have not returned).
+    """
+    today = pd.Timestamp.today().normalize() if today is None else pd.Timestamp(today)
+    terms = get_membership_terms(memberships, grace_days, today)
+    lapses = terms.loc[
+        terms["lapsed"], ["accountId", "termEndDate", "nextTermStartDate", "gapDays"]
+    ].reset_index(drop=True)
+    lapses["returned"] = lapses["nextTermStartDate"].notna()
+    lapses["lapseDays"] = lapses["gapDays"].where(
+        lapses["returned"], (today - lapses["termEndDate"]).dt.days
+    )
+    return lapses.drop(columns="gapDays")
+
+
 def fetch_report_urls(columns, mode):
     """
     Fetches report URLs for specified columns and mode.
@@ -528,5 +1393,5 @@ def fetch_report_urls(columns, mode):
 
 
 if __name__ == "__main__":
-    individuals = pd.read_csv("individuals.csv")
-    companies = pd.read_csv("companies.csv")
+    individuals = load_accounts("individuals")
+    companies = load_accounts("companies")
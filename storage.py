@@ -0,0 +1,383 @@
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+
+class ResponseCache:
+    """
+    Size-bounded on-disk cache of API responses, shared by all worker threads and coroutines.
+
+    Parameters:
+        path (str): The SQLite database file. Its directory is created if needed.
+        max_bytes (int): The maximum total size of the cached bodies. Least recently used
+                         entries are evicted once it is exceeded.
+
+    Behavior:
+        - Every entry stores the raw response body together with its `ETag` and `Last-Modified`
+          headers, the time it was stored (for TTL checks) and the time it was last read (for eviction).
+        - The database runs in WAL mode and a single connection is guarded by a lock, so concurrent
+          workers of one run and concurrent runs on the same machine can share the cache safely.
+        - The total size used for eviction is counted per process (read once when the cache is opened),
+          so with concurrent runs the cache can temporarily exceed `max_bytes` until one of them evicts.
+    """
+
+    def __init__(self, path: str, max_bytes: int):
+        self.path = path
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._connection = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("""
+            CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                url TEXT NOT NULL,
+                body BLOB NOT NULL,
+                etag TEXT,
+                last_modified TEXT,
+                stored_at REAL NOT NULL,
+                accessed_at REAL NOT NULL,
+                size INTEGER NOT NULL
+            )
+            """)
+        self._connection.commit()
+        self._size = self._connection.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM responses"
+        ).fetchone()[0]
+
+    def get(self, key: str):
+        """
+        Returns the cached entry for `key` as a dictionary with the keys "body", "etag",
+        "last_modified" and "stored_at", or None if there is no entry.
+        """
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT body, etag, last_modified, stored_at FROM responses WHERE key = ?",
+                (key,),
+            ).fetchone()
+            if row is None:
+                return None
+            self._connection.execute(
+                "UPDATE responses SET accessed_at = ? WHERE key = ?", (time.time(), key)
+            )
+            self._connection.commit()
+        return {
+            "body": row[0],
+            "etag": row[1],
+            "last_modified": row[2],
+            "stored_at": row[3],
+        }
+
+    def put(self, key: str, url: str, body: bytes, etag: str, last_modified: str):
+        """
+        Stores a response body and its validators, replacing any previous entry for `key`.
+        """
+        now = time.time()
+        with self._lock:
+            previous = self._connection.execute(
+                "SELECT size FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            self._connection.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (key, url, body, etag, last_modified, now, now, len(body)),
+            )
+            self._size += len(body) - (previous[0] if previous else 0)
+            if self._size > self.max_bytes:
+                self._evict()
+            self._connection.commit()
+
+    def touch(self, key: str) -> None:
+        """
+        Marks an entry as fresh again, after the server confirmed it with `304 Not Modified`.
+        """
+        now = time.time()
+        with self._lock:
+            self._connection.execute(
+                "UPDATE responses SET stored_at = ?, accessed_at = ? WHERE key = ?",
+                (now, now, key),
+            )
+            self._connection.commit()
+
+    def _evict(self) -> None:
+        # Evict down to 90% of the limit so that eviction does not run on every insert
+        target = self.max_bytes * 0.9
+        evicted = 0
+        rows = self._connection.execute(
+            "SELECT key, size FROM responses ORDER BY accessed_at"
+        ).fetchall()
+        for key, size in rows:
+            if self._size <= target:
+                break
+            self._connection.execute("DELETE FROM responses WHERE key = ?", (key,))
+            self._size -= size
+            evicted += 1
+        logging.debug(f"Evicted {evicted} responses from the cache")
+
+    def close(self) -> None:
+        with self._lock:
+            self._connection.close()
+
+
+class AttendeeStore:
+    """
+    Persistent store of the attendee lists of events, keyed by event ID.
+
+    Parameters:
+        path (str): The SQLite database file. Its directory is created if needed.
+
+    Behavior:
+        - Every event is stored with its start date, its attendee account IDs (as JSON) and a "final" flag.
+        - Final events are never requested again: `get_final` returns their attendees from disk.
+          Events that are not final yet (recent or upcoming ones) are overwritten on every run.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._connection = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("""
+            CREATE TABLE IF NOT EXISTS events (
+                event_id TEXT PRIMARY KEY,
+                start_date TEXT,
+                attendees TEXT NOT NULL,
+                final INTEGER NOT NULL,
+                fetched_at REAL NOT NULL
+            )
+            """)
+        self._connection.commit()
+
+    def get_final(self, event_ids: list) -> dict:
+        """
+        Returns a dictionary mapping each of the given event IDs that is marked final to its attendee list.
+        """
+        keys = {str(event_id): event_id for event_id in event_ids}
+        with self._lock:
+            rows = self._connection.execute(
+                "SELECT event_id, attendees FROM events WHERE final = 1"
+            ).fetchall()
+        return {
+            keys[event_id]: json.loads(attendees)
+            for event_id, attendees in rows
+            if event_id in keys
+        }
+
+    def put_many(self, events: list) -> None:
+        """
+        Stores attendee lists, replacing earlier versions of the same events.
+
+        Parameters:
+            events (list): Tuples of (event_id, start_date, attendees, final).
+        """
+        now = time.time()
+        with self._lock:
+            self._connection.executemany(
+                "INSERT OR REPLACE INTO events VALUES (?, ?, ?, ?, ?)",
+                [
+                    (str(event_id), start_date, json.dumps(attendees), int(final), now)
+                    for event_id, start_date, attendees, final in events
+                ],
+            )
+            self._connection.commit()
+
+    def close(self) -> None:
+        with self._lock:
+            self._connection.close()
+
+
+class AccountSnapshot:
+    """
+    Persistent snapshot of the raw per-account API payloads of the last extraction.
+
+    Parameters:
+        path (str): The SQLite database file. Its directory is created if needed.
+
+    Behavior:
+        - Stores one JSON payload per account and kind ("memberships", "details"), replacing older versions.
+        - Once the accounts modified since the snapshot was taken are declared with `mark_modified`,
+          `get` returns the stored payloads of all other accounts. Modified and new accounts
+          are fetched again and their new payloads stored with `put`. Before that, `get` returns nothing.
+        - Writes are buffered and written in a single transaction by `flush`.
+        - Small values such as the high-water mark of the last modification are kept with `get_meta`/`set_meta`.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._reuse = False
+        self._modified = set()
+        self._pending = []
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._connection = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("""
+            CREATE TABLE IF NOT EXISTS payloads (
+                account_id TEXT NOT NULL,
+                kind TEXT NOT NULL,
+                payload TEXT NOT NULL,
+                PRIMARY KEY (account_id, kind)
+            )
+            """)
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)"
+        )
+        self._connection.commit()
+
+    def mark_modified(self, account_ids) -> None:
+        """
+        Declares the given accounts as modified and the stored payloads of all other accounts as up to date.
+        """
+        self._modified = {str(account_id) for account_id in account_ids}
+        self._reuse = True
+
+    def get(self, kind: str, account_id):
+        """
+        Returns the stored payload of an unmodified account, or None if the account has to be fetched.
+        """
+        if not self._reuse or str(account_id) in self._modified:
+            return None
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT payload FROM payloads WHERE account_id = ? AND kind = ?",
+                (str(account_id), kind),
+            ).fetchone()
+        return None if row is None else json.loads(row[0])
+
+    def put(self, kind: str, account_id, payload) -> None:
+        """
+        Buffers a freshly fetched payload until the next `flush`.
+        """
+        with self._lock:
+            self._pending.append((str(account_id), kind, json.dumps(payload)))
+
+    def flush(self) -> None:
+        """
+        Writes all buffered payloads in one transaction.
+        """
+        with self._lock:
+            if self._pending:
+                self._connection.executemany(
+                    "INSERT OR REPLACE INTO payloads VALUES (?, ?, ?)", self._pending
+                )
+                self._connection.commit()
+                self._pending = []
+
+    def get_meta(self, key: str) -> str:
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT value FROM meta WHERE key = ?", (key,)
+            ).fetchone()
+        return None if row is None else row[0]
+
+    def set_meta(self, key: str, value: str) -> None:
+        with self._lock:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO meta VALUES (?, ?)", (key, value)
+            )
+            self._connection.commit()
+
+    def close(self) -> None:
+        self.flush()
+        with self._lock:
+            self._connection.close()
+
+
+class ExtractionJournal:
+    """
+    Append-only JSONL journal of the per-account payloads fetched during one extraction run.
+
+    Parameters:
+        path (str): The journal file. Its directory is created if needed.
+        resume (bool): Whether to load and keep appending to an existing journal. Otherwise it is truncated.
+        fsync_every (int): The number of records after which the file is flushed and fsync'ed to disk.
+
+    Behavior:
+        - Every record is one line {"stage": ..., "id": ..., "payload": ...}, written as soon as a request completes.
+        - Records are fsync'ed in batches, so a crash loses at most the last `fsync_every` records.
+          A torn last line (from a crash in the middle of a write) is ignored and cut off when the journal is loaded.
+        - `get` returns a payload recorded by an earlier, interrupted run, so it does not have to be fetched again.
+        - `close(remove=True)` deletes the journal once the run has written its output.
+    """
+
+    def __init__(self, path: str, resume: bool = False, fsync_every: int = 200):
+        self.path = path
+        self.fsync_every = fsync_every
+        self._lock = threading.Lock()
+        self._entries = {}
+        self._unsynced = 0
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        if resume and os.path.exists(path):
+            self._load()
+        self._file = open(path, "a" if resume else "w", encoding="utf-8")
+
+    def _load(self) -> None:
+        # Offset after the last complete line; a torn last line is cut off there so new records start on a fresh line
+        complete = 0
+        with open(self.path, "rb") as journal:
+            for line in journal:
+                if not line.endswith(b"\n"):
+                    logging.warning(f"Ignoring a torn last record in {self.path}")
+                    break
+                complete += len(line)
+                try:
+                    record = json.loads(line)
+                except (json.JSONDecodeError, UnicodeDecodeError):
+                    logging.warning(f"Ignoring a damaged record in {self.path}")
+                    continue
+                self._entries[(record["stage"], str(record["id"]))] = record["payload"]
+        if complete < os.path.getsize(self.path):
+            os.truncate(self.path, complete)
+        logging.info(
+            f"Resuming from {len(self._entries)} journaled results in {self.path}"
+        )
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, stage: str, account_id):
+        """
+        Returns the journaled payload of an account for a stage, or None if it has not been recorded.
+        """
+        return self._entries.get((stage, str(account_id)))
+
+    def record(self, stage: str, account_id, payload) -> None:
+        """
+        Appends a payload to the journal.
+        """
+        line = json.dumps({"stage": stage, "id": str(account_id), "payload": payload})
+        with self._lock:
+            self._file.write(line + "\n")
+            self._unsynced += 1
+            if self._unsynced >= self.fsync_every:
+                self._sync()
+
+    def _sync(self) -> None:
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._unsynced = 0
+
+    def sync(self) -> None:
+        """
+        Forces all records written so far to disk.
+        """
+        with self._lock:
+            self._sync()
+
+    def close(self, remove: bool = False) -> None:
+        with self._lock:
+            self._sync()
+            self._file.close()
+        if remove:
+            os.remove(self.path)
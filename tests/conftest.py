@@ -0,0 +1,21 @@
+import os
+import sys
+
+import pytest
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+
+@pytest.fixture(scope="session")
+def extraction():
+    """
+    The `extract_crm_to_csv` module, which loads its logging config from the working directory on import.
+    """
+    cwd = os.getcwd()
+    os.chdir(REPO_ROOT)
+    try:
+        import extract_crm_to_csv
+    finally:
+        os.chdir(cwd)
+    return extract_crm_to_csv
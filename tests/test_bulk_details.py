@@ -0,0 +1,102 @@
+import os
+import socket
+import subprocess
+import sys
+import time
+
+import pandas as pd
+import pytest
+
+BENCHMARKS = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks"
+)
+
+
+@pytest.fixture(scope="module")
+def mock_server():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        port = s.getsockname()[1]
+    server = subprocess.Popen(
+        [
+            sys.executable,
+            os.path.join(BENCHMARKS, "mock_neoncrm.py"),
+            "--accounts", "300",
+            "--events", "20",
+            "--port", str(port),
+        ],
+        stdout=subprocess.DEVNULL,
+    )  # fmt: skip
+    try:
+        deadline = time.monotonic() + 30
+        while True:
+            try:
+                socket.create_connection(("127.0.0.1", port), timeout=1).close()
+                break
+            except OSError:
+                if time.monotonic() > deadline:
+                    raise
+                time.sleep(0.1)
+        yield f"http://127.0.0.1:{port}/v2"
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def extract(extraction, monkeypatch, workdir, bulk_details: bool) -> tuple:
+    monkeypatch.chdir(workdir)
+    monkeypatch.setattr(extraction, "BULK_DETAILS", bulk_details)
+    monkeypatch.setattr(extraction, "USE_CACHE", False)
+    monkeypatch.setattr(extraction, "USE_ATTENDEE_STORE", False)
+    monkeypatch.setattr(extraction, "USE_SNAPSHOT", False)
+    monkeypatch.setattr(extraction, "rate_limiter", extraction.TokenBucket(1000, 1000))
+    requests = extraction.connection_stats["requests"]
+    extraction.print_all_accounts_to_csv()
+    tables = {
+        name: pd.read_csv(workdir / (name + ".csv"))
+        for name in ["individuals", "companies"]
+    }
+    return tables, extraction.connection_stats["requests"] - requests
+
+
+def test_bulk_details_keep_the_columns_of_a_regular_run(
+    extraction, mock_server, monkeypatch, tmp_path
+):
+    monkeypatch.setattr(extraction, "API_BASE_URL", mock_server)
+    (tmp_path / "regular").mkdir()
+    (tmp_path / "bulk").mkdir()
+    regular, regular_requests = extract(
+        extraction, monkeypatch, tmp_path / "regular", bulk_details=False
+    )
+    bulk, bulk_requests = extract(
+        extraction, monkeypatch, tmp_path / "bulk", bulk_details=True
+    )
+
+    # the search filled the details instead of one request per account
+    assert bulk_requests < regular_requests - 200
+
+    for name in regular:
+        assert list(bulk[name].columns) == list(regular[name].columns)
+        pd.testing.assert_frame_equal(
+            bulk[name].drop(columns="Export Date"),
+            regular[name].drop(columns="Export Date"),
+        )
+
+
+def test_bulk_details_fall_back_if_the_search_misses_a_column(
+    extraction, mock_server, monkeypatch, tmp_path
+):
+    monkeypatch.setattr(extraction, "API_BASE_URL", mock_server)
+    (tmp_path / "regular").mkdir()
+    (tmp_path / "bulk").mkdir()
+    regular, _ = extract(
+        extraction, monkeypatch, tmp_path / "regular", bulk_details=False
+    )
+    search_fields = dict(extraction.DETAIL_SEARCH_FIELDS)
+    del search_fields["Email 1"]
+    monkeypatch.setattr(extraction, "DETAIL_SEARCH_FIELDS", search_fields)
+    bulk, _ = extract(extraction, monkeypatch, tmp_path / "bulk", bulk_details=True)
+
+    # "primaryContact.email1" of the individuals is only in the per-account details
+    for name in regular:
+        assert list(bulk[name].columns) == list(regular[name].columns)
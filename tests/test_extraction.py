@@ -0,0 +1,145 @@
+import asyncio
+
+import numpy as np
+import pytest
+
+
+@pytest.fixture
+def policy(extraction):
+    return extraction.RetryPolicy(
+        max_attempts=4,
+        base_delay=1.0,
+        max_delay=5.0,
+        error_budget=2,
+        retryable_statuses=(429, 503),
+        fatal_statuses=(401,),
+    )
+
+
+def test_retry_policy_backoff_grows_up_to_the_maximum(policy, monkeypatch, extraction):
+    monkeypatch.setattr(extraction.random, "uniform", lambda low, high: high)
+    assert [policy.backoff(attempt) for attempt in range(1, 6)] == [1, 2, 4, 5, 5]
+    monkeypatch.setattr(extraction.random, "uniform", lambda low, high: low)
+    assert policy.backoff(3) == 0
+
+
+def test_retry_policy_classifies_statuses(policy):
+    assert policy.classify(503) == "retry"
+    assert policy.classify(401) == "fatal"
+    assert policy.classify(404) == "fail"
+
+
+def test_retry_policy_error_budget(policy, extraction):
+    policy.record_error()
+    policy.record_error()
+    policy.check_budget()
+    with pytest.raises(extraction.ErrorBudgetExhausted):
+        policy.record_error()
+    with pytest.raises(extraction.FatalRequestError):
+        policy.check_budget()
+
+
+def test_token_bucket_paces_requests_after_the_burst(extraction, monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(extraction.time, "monotonic", lambda: now[0])
+    bucket = extraction.TokenBucket(rate=2, burst=3)
+    assert [bucket.reserve() for _ in range(3)] == [0, 0, 0]
+    assert [bucket.reserve() for _ in range(2)] == [0.5, 1.0]
+    # the queued requests are paid back before new tokens accrue
+    now[0] += 2
+    assert [bucket.reserve() for _ in range(3)] == [0, 0, 0.5]
+
+
+def test_token_bucket_pause_delays_every_request(extraction, monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(extraction.time, "monotonic", lambda: now[0])
+    bucket = extraction.TokenBucket(rate=2, burst=3)
+    bucket.pause(10)
+    assert bucket.reserve() == 10.5
+    now[0] += 10
+    assert bucket.reserve() == 1.0
+
+
+def test_parse_memberships_returns_the_first_active_membership(extraction):
+    response = [
+        {
+            "termEndDate": "2024-12-31",
+            "membershipLevel": {"name": "Individual"},
+            "fee": 50.0,
+        },
+        {
+            "termEndDate": "2026-12-31T00:00:00",
+            "membershipLevel": {"name": "Family"},
+            "fee": 80.0,
+            "transactionDate": "2026-01-15",
+        },
+        {"termEndDate": "2027-12-31", "membershipLevel": {"name": "Patron"}},
+    ]
+    record = extraction.parse_memberships("7", response, today="2026-10-17")
+    assert tuple(record) == (
+        "7",
+        "Family",
+        80.0,
+        "2026-12-31T00:00:00",
+        "2026-01-15",
+        3,
+    )
+
+
+def test_parse_memberships_without_an_active_membership(extraction):
+    response = [{"termEndDate": "2025-12-31"}, {"membershipLevel": {"name": "Family"}}]
+    record = extraction.parse_memberships("7", response, today="2026-10-17")
+    account_id, membership_type, fee, term_end_date, transaction_date, total = record
+    assert (account_id, membership_type, fee, total) == (
+        "7",
+        "No Membership active",
+        "0.0",
+        2,
+    )
+    assert np.isnan(term_end_date) and np.isnan(transaction_date)
+    assert extraction.parse_memberships("7", None).total_memberships == 0
+
+
+def test_fair_scheduler_hands_slots_out_in_turn(extraction):
+    async def run():
+        scheduler = extraction.FairScheduler(2)
+        order = []
+
+        async def job(pipeline):
+            await scheduler.acquire(pipeline)
+            order.append(pipeline)
+            await asyncio.sleep(0)
+            scheduler.release()
+
+        # the memberships pipeline queues all its accounts before the others
+        jobs = [job("memberships") for _ in range(6)]
+        jobs += [job("details") for _ in range(2)] + [
+            job("attendees") for _ in range(2)
+        ]
+        await asyncio.gather(*jobs)
+        return order, scheduler._free
+
+    order, free = asyncio.run(run())
+    assert order[:2] == ["memberships", "memberships"]
+    assert order[2:5] == ["memberships", "details", "attendees"]
+    assert sorted(order) == sorted(
+        ["memberships"] * 6 + ["details"] * 2 + ["attendees"] * 2
+    )
+    assert free == 2
+
+
+def test_fair_scheduler_skips_cancelled_waiters(extraction):
+    async def run():
+        scheduler = extraction.FairScheduler(1)
+        await scheduler.acquire("details")
+        cancelled = asyncio.create_task(scheduler.acquire("details"))
+        waiting = asyncio.create_task(scheduler.acquire("attendees"))
+        await asyncio.sleep(0)
+        cancelled.cancel()
+        await asyncio.sleep(0)
+        scheduler.release()
+        await asyncio.wait_for(waiting, 1)
+        scheduler.release()
+        return scheduler._free
+
+    assert asyncio.run(run()) == 1
@@ -0,0 +1,159 @@
+import numpy as np
+import pandas as pd
+
+from metrics import (
+    AccountDataset,
+    DUPLICATE_MIN_SCORE,
+    UNKNOWN_MEMBERSHIP,
+    get_duplicate_accounts,
+    get_duplicate_candidates,
+    get_members,
+    get_segment,
+    get_segments,
+    pivot_counts,
+    score_duplicate_pairs,
+    soundex,
+)
+
+
+def test_accounts_with_an_unknown_membership_are_not_members():
+    df = pd.DataFrame(
+        {
+            "accountId": ["1", "2", "3", "4", "5"],
+            "Membership Type": [
+                "Individual",
+                "No Membership active",
+                "No Membership active",
+                UNKNOWN_MEMBERSHIP,
+                np.nan,
+            ],
+            "Number of Memberships": [1, 0, 2, np.nan, np.nan],
+        }
+    )
+    assert list(get_members(df)["accountId"]) == ["1"]
+
+    segments = get_segments(df)
+    accounts = {
+        segment: list(get_segment(df, segments, segment)["accountId"])
+        for segment in ["members", "nonMembers", "pastMembers", "both", "all"]
+    }
+    assert accounts == {
+        "members": ["1"],
+        "nonMembers": ["2", "3"],
+        "pastMembers": ["3"],
+        "both": ["1", "3"],
+        "all": ["1", "2", "3", "4", "5"],
+    }
+
+
+def test_soundex_codes():
+    assert soundex("Robert") == "R163"
+    assert soundex("Rupert") == "R163"
+    assert soundex("Tymczak") == "T522"
+    assert soundex("Pfister") == "P236"
+    assert soundex("Ashcraft") == "A261"
+    assert soundex("Müller") == soundex("Muller") == "M460"
+    assert soundex("Lee") == "L000"
+    assert soundex("") is None
+
+
+def individuals(rows: list) -> pd.DataFrame:
+    return pd.DataFrame(
+        rows, columns=["accountId", "firstName", "lastName", "email", "companyName"]
+    )
+
+
+def test_duplicate_candidates_share_a_blocking_key():
+    df = individuals(
+        [
+            ["1", "Robert", "Meier", "robert@example.com", None],
+            # same Soundex codes of first and last name
+            ["2", "Rupert", "Mayer", None, None],
+            # same email up to case and "+tag"
+            ["3", "Anna", "Keller", "Robert+crm@Example.com", None],
+            # nothing in common with the others
+            ["4", "Beat", "Weber", "beat@example.com", None],
+        ]
+    )
+    pairs = get_duplicate_candidates(df, "individual")
+    assert sorted(zip(pairs["row_a"], pairs["row_b"])) == [(0, 1), (0, 2)]
+
+
+def test_duplicate_scores_and_threshold():
+    df = individuals(
+        [
+            ["1", "Anna", "Keller", "anna@example.com", "Alpine AG"],
+            # same email: 0.45 and the same name: 0.35
+            ["2", "Anna", "Keller", "ANNA@example.com", None],
+            # same name and employer, no email: 0.35 + 0.2
+            ["3", "Anna", "Keller", None, "Alpine AG"],
+            # a similar name alone stays below DUPLICATE_MIN_SCORE
+            ["4", "Anna", "Kellner", None, None],
+        ]
+    )
+    pairs = pd.DataFrame({"row_a": [0, 0, 0], "row_b": [1, 2, 3]})
+    scored = score_duplicate_pairs(df, "individual", pairs)
+    assert scored["score"].round(2).tolist() == [0.8, 0.55, round(0.35 * 22 / 23, 2)]
+    assert scored["email"].tolist() == [True, False, False]
+
+    above = score_duplicate_pairs(df, "individual", pairs, DUPLICATE_MIN_SCORE)
+    assert above["row_b"].tolist() == [1, 2]
+
+    duplicates = get_duplicate_accounts(df, "individual")
+    assert list(zip(duplicates["accountId"], duplicates["duplicateAccountId"])) == [
+        ("1", "2"),
+        ("1", "3"),
+    ]
+    assert duplicates["score"].tolist() == [0.8, 0.55]
+
+
+def test_account_dataset_does_not_modify_its_input():
+    accounts = pd.DataFrame({"accountId": ["1", "2"]})
+    dataset = AccountDataset(accounts, np.array([0, 3]))
+    assert list(accounts.columns) == ["accountId"]
+    assert dataset.accounts["event_count"].tolist() == [0, 3]
+
+
+def test_pivot_counts_matches_the_baseline_crosstab():
+    rng = np.random.default_rng(0)
+    rows = pd.Series(rng.choice(["Individual", "Family", "Patron"], 500))
+    columns = pd.Series(rng.choice([0, 1, 2, 3, 5, 8], 500))
+    expected = pd.crosstab(rows, columns)
+
+    counts = pivot_counts(rows, columns)
+    assert list(counts.index) == list(rows.unique())
+    assert list(counts.columns) == list(columns.unique())
+    pd.testing.assert_frame_equal(
+        counts,
+        expected.loc[rows.unique(), columns.unique()],
+        check_names=False,
+        check_dtype=False,
+    )
+
+    bucketed = pd.crosstab(
+        rows, columns.where(columns <= 3, "4+"), margins=True, margins_name="Total"
+    )
+    counts = pivot_counts(
+        rows,
+        columns,
+        column_buckets=lambda n: n if n <= 3 else "4+",
+        row_order="sorted",
+        column_order=[0, 1, 2, 3, "4+"],
+        totals="both",
+        total_label="Total",
+    )
+    pd.testing.assert_frame_equal(
+        counts,
+        bucketed.loc[sorted(rows.unique()) + ["Total"], [0, 1, 2, 3, "4+", "Total"]],
+        check_names=False,
+        check_dtype=False,
+    )
+
+
+def test_pivot_counts_skips_missing_values():
+    rows = pd.Series(["a", "b", np.nan, "a"])
+    columns = pd.Series([1, np.nan, 1, 1])
+    counts = pivot_counts(rows, columns, row_order=["a", "b", "c"])
+    assert counts.loc["a", 1] == 2
+    assert counts.loc["b"].sum() == 0
+    assert counts.loc["c"].sum() == 0
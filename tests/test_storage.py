@@ -0,0 +1,47 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from storage import ExtractionJournal  # noqa: E402
+
+
+def test_journal_resumes_after_a_torn_write(tmp_path):
+    path = str(tmp_path / "journal.jsonl")
+    journal = ExtractionJournal(path)
+    journal.record("details", 1, {"accountId": 1})
+    journal.record("details", 2, {"accountId": 2})
+    journal.close()
+    # a crash in the middle of the next write
+    with open(path, "a", encoding="utf-8") as f:
+        f.write('{"stage": "details", "id": "9", "pay')
+
+    journal = ExtractionJournal(path, resume=True)
+    assert len(journal) == 2
+    journal.record("details", 3, {"accountId": 3})
+    journal.record("details", 4, {"accountId": 4})
+    journal.close()
+
+    journal = ExtractionJournal(path, resume=True)
+    assert [journal.get("details", i) for i in [1, 2, 3, 4]] == [
+        {"accountId": i} for i in [1, 2, 3, 4]
+    ]
+    assert journal.get("details", 9) is None
+    journal.close(remove=True)
+
+
+def test_journal_fsyncs_in_batches(tmp_path, monkeypatch):
+    fsyncs = []
+    monkeypatch.setattr(os, "fsync", fsyncs.append)
+    path = str(tmp_path / "journal.jsonl")
+    journal = ExtractionJournal(path, fsync_every=3)
+    for i in range(7):
+        journal.record("memberships", i, [])
+    assert len(fsyncs) == 2
+    # the last record is not on disk yet, but close syncs it
+    with open(path, encoding="utf-8") as f:
+        assert len(f.readlines()) == 6
+    journal.close()
+    assert len(fsyncs) == 3
+    with open(path, encoding="utf-8") as f:
+        assert len(f.readlines()) == 7